@@ -0,0 +1,246 @@
+from PyQt6.QtWidgets import QWidget, QHBoxLayout, QProgressBar, QPushButton
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from itertools import islice
+import threading
+
+
+class TaskSignals(QObject):
+    """Сигналы фоновой задачи; доставляются в поток GUI через очередь событий"""
+
+    chunk = pyqtSignal(int, object)  # номер задачи, часть строк
+    progress = pyqtSignal(int, int, int)  # номер задачи, загружено, всего (-1 - неизвестно)
+    finished = pyqtSignal(int, object)  # номер задачи, результат (для задач без частей)
+    failed = pyqtSignal(int, str)
+    done = pyqtSignal(int)  # номер задачи; последний сигнал, run() завершается
+
+
+class BackgroundTask(QRunnable):
+    """Выполняет запрос в пуле потоков
+
+    Если задан chunk_size, результат fetch() (список или генератор строк,
+    например Database.stream_query) передаётся частями, иначе целиком в сигнале finished.
+    """
+
+    def __init__(self, task_id, fetch, chunk_size=None, count=None):
+        super().__init__()
+        self.task_id = task_id
+        self.fetch = fetch
+        self.chunk_size = chunk_size
+        self.count = count
+        self.signals = TaskSignals()
+        self._cancelled = threading.Event()
+        # Задачу удаляет не пул, а сборщик Python, когда BackgroundLoader
+        # её отпустил: к ней можно обращаться и после выполнения
+        self.setAutoDelete(False)
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def run(self):
+        try:
+            total = self.count() if self.count else None
+            if total is None:
+                total = -1
+
+            result = self.fetch()
+            if self.is_cancelled():
+                return
+            if result is None:
+                self.signals.failed.emit(self.task_id, "Запрос не вернул данных")
+                return
+
+            if not self.chunk_size:
+                self.signals.finished.emit(self.task_id, result)
+                return
+
+            loaded = 0
+            rows = iter(result)
+            try:
+                while not self.is_cancelled():
+                    chunk = list(islice(rows, self.chunk_size))
+                    if not chunk:
+                        break
+                    loaded += len(chunk)
+                    self.signals.chunk.emit(self.task_id, chunk)
+                    self.signals.progress.emit(self.task_id, loaded, total)
+            finally:
+                # Прерванный потоковый запрос сразу освобождает соединение
+                if hasattr(rows, 'close'):
+                    rows.close()
+
+            if not self.is_cancelled():
+                self.signals.finished.emit(self.task_id, None)
+
+        except Exception as e:
+            print(f"❌ Ошибка фоновой загрузки: {e}")
+            if not self.is_cancelled():
+                self.signals.failed.emit(self.task_id, str(e))
+        finally:
+            self.signals.done.emit(self.task_id)
+
+
+class BackgroundLoader(QObject):
+    """Фоновая загрузка данных окна
+
+    load() - основная загрузка частями с прогрессом (новая отменяет предыдущую),
+    run() - независимые небольшие задачи с одним результатом.
+    Сигналы отменённых и устаревших задач игнорируются.
+    """
+
+    CHUNK_SIZE = 500
+
+    progress = pyqtSignal(int, int)  # загружено, всего (-1 - неизвестно)
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, parent=None, thread_pool=None):
+        super().__init__(parent)
+        self.thread_pool = thread_pool or QThreadPool.globalInstance()
+        self._next_id = 0
+        self._tasks = {}  # номер задачи -> (задача, on_chunk, on_done, on_error)
+        self._alive = {}  # номер задачи -> задача в очереди пула или выполняющаяся
+        self._load_id = None
+        self._on_load_cancel = None  # обработчик отмены основной загрузки пользователем
+
+    def is_loading(self):
+        """Идёт ли основная загрузка"""
+        return self._load_id is not None
+
+    def load(self, fetch, on_chunk, on_done=None, on_error=None, count=None, chunk_size=None,
+             on_cancel=None):
+        """Запуск основной загрузки; предыдущая отменяется
+
+        on_cancel вызывается при отмене загрузки через cancel(), когда уже
+        загруженные данные должны стать рабочими (обычно тот же шаг, что on_done).
+        """
+        self.cancel(notify=False)
+        self._load_id = self._start(BackgroundTask(
+            self._new_id(), fetch, chunk_size or self.CHUNK_SIZE, count), on_chunk, on_done, on_error)
+        self._on_load_cancel = on_cancel
+        self.busy_changed.emit(True)
+        self.progress.emit(0, -1)
+        return self._load_id
+
+    def run(self, fetch, on_result, on_error=None):
+        """Запуск задачи, результат которой передаётся целиком"""
+        return self._start(BackgroundTask(self._new_id(), fetch), None, on_result, on_error)
+
+    def discard(self, task_id):
+        """Отмена задачи run(): ещё не начатая снимается с очереди, результат начатой игнорируется"""
+        entry = self._tasks.pop(task_id, None)
+        if entry is None:
+            return False
+        entry[0].cancel()
+        return self._take(entry[0])
+
+    def cancel(self, notify=True):
+        """Отмена основной загрузки; уже показанные данные остаются
+
+        notify=False - обработчик on_cancel не вызывается (загрузка заменяется
+        новой или окно закрывается).
+        """
+        if self._load_id is None:
+            return
+        task = self._tasks.pop(self._load_id, None)
+        if task:
+            task[0].cancel()
+            self._take(task[0])
+        on_cancel, self._on_load_cancel = self._on_load_cancel, None
+        self._load_id = None
+        self.busy_changed.emit(False)
+        if notify and on_cancel:
+            on_cancel()
+
+    def _take(self, task):
+        """Снятие ещё не начатой задачи с очереди пула"""
+        if not self.thread_pool.tryTake(task):
+            return False
+        # Задача не будет выполнена и не пришлёт done
+        self._alive.pop(task.task_id, None)
+        return True
+
+    def _new_id(self):
+        self._next_id += 1
+        return self._next_id
+
+    def _start(self, task, on_chunk, on_done, on_error):
+        self._tasks[task.task_id] = (task, on_chunk, on_done, on_error)
+        task.signals.chunk.connect(self._on_chunk)
+        task.signals.progress.connect(self._on_progress)
+        task.signals.finished.connect(self._on_finished)
+        task.signals.failed.connect(self._on_failed)
+        task.signals.done.connect(self._on_done)
+        # Ссылка держит задачу до её завершения, даже если результат уже не нужен
+        self._alive[task.task_id] = task
+        self.thread_pool.start(task)
+        return task.task_id
+
+    def _finish(self, task_id):
+        entry = self._tasks.pop(task_id, None)
+        if task_id == self._load_id:
+            self._load_id = None
+            self._on_load_cancel = None
+            self.busy_changed.emit(False)
+        return entry
+
+    def _on_chunk(self, task_id, rows):
+        entry = self._tasks.get(task_id)
+        if entry and entry[1]:
+            entry[1](rows)
+
+    def _on_progress(self, task_id, loaded, total):
+        if task_id == self._load_id:
+            self.progress.emit(loaded, total)
+
+    def _on_finished(self, task_id, result):
+        entry = self._finish(task_id)
+        if entry and entry[2]:
+            if entry[1] is None:
+                entry[2](result)
+            else:
+                entry[2]()
+
+    def _on_failed(self, task_id, message):
+        entry = self._finish(task_id)
+        if entry and entry[3]:
+            entry[3](message)
+
+    def _on_done(self, task_id):
+        self._alive.pop(task_id, None)
+
+
+class LoadingIndicator(QWidget):
+    """Прогресс фоновой загрузки с кнопкой отмены; скрыт, пока загрузки нет"""
+
+    def __init__(self, loader, parent=None):
+        super().__init__(parent)
+        self.loader = loader
+
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFormat("Загружено: %v")
+        layout.addWidget(self.progress_bar)
+
+        cancel_btn = QPushButton("Отмена")
+        # Отмена пользователем: загруженная часть данных становится рабочей
+        cancel_btn.clicked.connect(lambda: self.loader.cancel())
+        layout.addWidget(cancel_btn)
+
+        self.setLayout(layout)
+        self.hide()
+
+        self.loader.busy_changed.connect(self.setVisible)
+        self.loader.progress.connect(self.on_progress)
+
+    def on_progress(self, loaded, total):
+        if total < 0:
+            # Общее количество неизвестно - бегущий индикатор
+            self.progress_bar.setRange(0, 0)
+        else:
+            self.progress_bar.setRange(0, max(total, 1))
+            self.progress_bar.setFormat(f"Загружено: %v из {total}")
+            self.progress_bar.setValue(loaded)
@@ -0,0 +1,69 @@
+"""Сравнение памяти кэша товаров: словари DictCursor и записи row_store
+
+Запуск: python bench_row_store.py [количество_товаров]
+"""
+from decimal import Decimal
+from row_store import ProductRecord
+import sys
+import tracemalloc
+
+
+CATEGORIES = ["Кроссовки", "Туфли", "Ботинки"]
+BRANDS = ["Nike", "Adidas", "Puma", "Converse"]
+SUPPLIERS = ["Поставщик 1", "Поставщик 2", "Поставщик 3"]
+
+
+def make_rows(count):
+    """Строки в том виде, в каком их возвращает DictCursor
+
+    Названия из справочников создаются заново для каждой строки, как при
+    разборе ответа сервера, а не берутся из общих констант.
+    """
+    return [
+        {
+            'article': f"ART{i:06d}",
+            'p_name': f"Товар {i}",
+            'category_name': ''.join(CATEGORIES[i % 3]),
+            'b_name': ''.join(BRANDS[i % 4]),
+            's_name': ''.join(SUPPLIERS[i % 3]),
+            'price': Decimal(1000 + i % 500),
+            'quantity': i % 20,
+            'discount_percent': i % 30,
+            'description': f"Описание товара {i}",
+            'image_path': None,
+            'id': i + 1,
+        }
+        for i in range(count)
+    ]
+
+
+def measure(build):
+    """Память (байт), которую удерживает результат build()"""
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, result
+
+
+def build_records(count):
+    """Кэш записей: строки из курсора преобразуются и сразу освобождаются"""
+    return [ProductRecord.from_row(row) for row in make_rows(count)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    dict_size, rows = measure(lambda: make_rows(count))
+    del rows
+    record_size, records = measure(lambda: build_records(count))
+
+    print(f"Товаров: {count}")
+    print(f"Словари DictCursor: {dict_size / 1024 / 1024:.1f} МБ ({dict_size / count:.0f} байт на товар)")
+    print(f"Записи ProductRecord: {record_size / 1024 / 1024:.1f} МБ ({record_size / count:.0f} байт на товар)")
+    print(f"Экономия: {(1 - record_size / dict_size) * 100:.0f}%")
+    return records
+
+
+if __name__ == "__main__":
+    main()
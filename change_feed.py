@@ -0,0 +1,202 @@
+from PyQt6.QtCore import QObject, QEvent, QTimer, pyqtSignal
+from database import statements
+from background import BackgroundLoader
+from reference_data import reference_data
+import time
+
+
+# Действия в журнале изменений
+INSERT = 'insert'
+UPDATE = 'update'
+DELETE = 'delete'
+
+statements.register('change_log_head', "SELECT COALESCE(MAX(id), 0) AS last_id FROM change_log")
+statements.register('change_log_since', """
+                    SELECT id, row_key, action
+                    FROM change_log
+                    WHERE table_name = %s AND id > %s
+                    ORDER BY id
+                    LIMIT %s
+                    """)
+
+
+def merge_changes(changes, key, action):
+    """Учёт действия в итоговых изменениях: побеждает последнее, но вставка с правками остаётся вставкой"""
+    if action == UPDATE and changes.get(key) == INSERT:
+        return
+    changes[key] = action
+
+
+def collapse(rows):
+    """Итоговое действие по каждой строке журнала"""
+    changes = {}
+    for row in rows:
+        merge_changes(changes, row['row_key'], row['action'])
+    return changes
+
+
+class ChangeFeed(QObject):
+    """Опрос журнала change_log (заполняется триггерами, см. database.txt)
+
+    Каждый опрос читает только записи после последней увиденной, поэтому объём
+    синхронизации зависит от числа изменений, а не от размера таблицы.
+    Запрос выполняется в пуле потоков, изменения приходят в сигнале changed.
+    """
+
+    POLL_INTERVAL = 3000  # мс
+    BATCH_SIZE = 500
+    OWN_WRITE_TIMEOUT = 60  # с
+
+    changed = pyqtSignal(object)  # {ключ строки: действие}
+
+    def __init__(self, db, table, interval=POLL_INTERVAL, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.table = table
+        self.last_id = None  # последняя увиденная запись журнала
+        self.loader = BackgroundLoader(self)
+        self._polling = False
+        self._unavailable = False  # журнал не прочитался: повторно при каждом показе окна не проверяется
+        self._own_writes = {}  # ключ строки -> (сколько записей пропустить, до какого момента)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.poll)
+
+    def start(self):
+        """Запуск опроса; при первом запуске - с текущего конца журнала"""
+        if self._unavailable:
+            return False
+        if self.last_id is None:
+            result = self.db.execute_named('change_log_head')
+            if not result:
+                print("❌ Журнал изменений недоступен, синхронизация отключена")
+                self._unavailable = True
+                return False
+            self.last_id = result[0]['last_id']
+        self._timer.start()
+        return True
+
+    def stop(self):
+        """Остановка опроса; после start() пропущенные изменения будут прочитаны"""
+        self._timer.stop()
+
+    def is_running(self):
+        return self._timer.isActive()
+
+    def skip(self, key):
+        """Запись строки сделана этим окном и уже применена: её запись в журнале не рассылается"""
+        key = str(key)
+        count, _ = self._own_writes.get(key, (0, 0))
+        self._own_writes[key] = (count + 1, time.monotonic() + self.OWN_WRITE_TIMEOUT)
+
+    def foreign(self, rows):
+        """Записи журнала без отражений собственных записей окна"""
+        if not self._own_writes:
+            return rows
+        now = time.monotonic()
+        self._own_writes = {key: entry for key, entry in self._own_writes.items() if entry[1] > now}
+        result = []
+        for row in rows:
+            key = str(row['row_key'])
+            entry = self._own_writes.get(key)
+            if entry is None:
+                result.append(row)
+            elif entry[0] > 1:
+                self._own_writes[key] = (entry[0] - 1, entry[1])
+            else:
+                del self._own_writes[key]
+        return result
+
+    def poll(self):
+        """Чтение новых записей журнала"""
+        if self._polling or self.last_id is None:
+            return
+        self._polling = True
+        last_id = self.last_id
+        self.loader.run(
+            lambda: self.db.execute_named('change_log_since', (self.table, last_id, self.BATCH_SIZE)),
+            self.on_rows, self.on_failed
+        )
+
+    def on_rows(self, rows):
+        self._polling = False
+        if not rows:
+            return
+        self.last_id = rows[-1]['id']
+        changes = collapse(self.foreign(rows))
+        if changes:
+            self.changed.emit(changes)
+        if len(rows) == self.BATCH_SIZE:
+            # Изменений больше одной порции - остаток читается сразу
+            self.poll()
+
+    def on_failed(self, message):
+        self._polling = False
+        print(f"❌ Ошибка опроса журнала изменений: {message}")
+
+
+class WindowSync(QObject):
+    """Синхронизация окна с журналом: изменения его таблицы и справочников
+
+    Журнал запоминается при создании, до загрузки окна, чтобы не пропустить
+    изменения во время неё; пришедшие во время загрузки изменения копятся и
+    применяются по её окончании (flush). Опрос идёт, пока окно показано.
+    """
+
+    def __init__(self, window, table, apply_changes, on_references=None):
+        super().__init__(window)
+        self.loader = window.loader
+        self.apply_changes = apply_changes  # обработчик окна {ключ строки: действие}
+        self.on_references = on_references  # вызывается после сброса кэша справочников
+        self.pending = {}
+
+        self.feed = ChangeFeed(window.db, table, parent=self)
+        self.feed.changed.connect(self.on_changes)
+        self.reference_feed = ChangeFeed(window.db, 'references', parent=self)
+        self.reference_feed.changed.connect(self.on_reference_changes)
+        window.installEventFilter(self)
+        self.start()
+
+    def start(self):
+        self.feed.start()
+        self.reference_feed.start()
+
+    def stop(self):
+        self.feed.stop()
+        self.reference_feed.stop()
+
+    def eventFilter(self, watched, event):
+        # Скрытое окно не опрашивает журнал; пропущенное прочитается при показе
+        if event.type() == QEvent.Type.Show:
+            self.start()
+        elif event.type() == QEvent.Type.Hide:
+            self.stop()
+        return False
+
+    def skip(self, key):
+        """Запись сделана самим окном (см. ChangeFeed.skip)"""
+        self.feed.skip(key)
+
+    def reset(self):
+        """Окно начинает загрузку: она прочитает текущее состояние БД, накопленное уже учтено"""
+        self.pending = {}
+
+    def flush(self):
+        """Загрузка окончена: применяем изменения, пришедшие во время неё"""
+        changes, self.pending = self.pending, {}
+        self.apply_changes(changes)
+
+    def on_changes(self, changes):
+        if self.loader.is_loading():
+            for key, action in changes.items():
+                merge_changes(self.pending, key, action)
+            return
+        self.apply_changes(changes)
+
+    def on_reference_changes(self, changes):
+        """Справочники изменены: формы и фильтры перечитают их из БД"""
+        for name in changes:
+            reference_data.invalidate(name)
+        if self.on_references:
+            self.on_references(changes)
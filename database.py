@@ -1,49 +1,456 @@
 import pymysql
-from pymysql import Error
+from pymysql import Error, InterfaceError, OperationalError
+from contextlib import contextmanager
+from functools import lru_cache
+import re
+import threading
+import time
 
 
-class Database:
+# Коды ошибок, означающие потерю соединения с сервером:
+# 2003 - сервер недоступен, 2006 - сервер закрыл соединение (wait_timeout),
+# 2013 - соединение потеряно во время запроса, 2055 - ошибка чтения/записи сокета
+CONNECTION_LOST_ERRORS = {2003, 2006, 2013, 2055}
+
+
+# Виды запросов
+READ = 'read'
+WRITE = 'write'
+DDL = 'ddl'
+
+READ_KEYWORDS = {'SELECT', 'SHOW', 'DESCRIBE', 'DESC', 'EXPLAIN'}
+DDL_KEYWORDS = {'CREATE', 'ALTER', 'DROP', 'TRUNCATE', 'RENAME'}
+WRITE_KEYWORDS_RE = re.compile(r'\b(INSERT|UPDATE|DELETE|REPLACE)\b', re.IGNORECASE)
+# Первое ключевое слово запроса после комментариев и скобок
+FIRST_KEYWORD_RE = re.compile(r'(?:\s|\(|--[^\n]*\n|/\*.*?\*/)*(\w+)', re.DOTALL)
+# Строковые литералы, идентификаторы в кавычках и комментарии: слова в них - не ключевые
+LITERALS_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`|--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+@lru_cache(maxsize=1024)
+def classify(query):
+    """Вид запроса: чтение, запись или DDL (результат кэшируется по тексту запроса)"""
+    match = FIRST_KEYWORD_RE.match(query)
+    keyword = match.group(1).upper() if match else ''
+
+    if keyword in READ_KEYWORDS:
+        return READ
+    if keyword in DDL_KEYWORDS:
+        return DDL
+    if keyword == 'WITH':
+        # CTE в MySQL 8 может предварять и изменяющий запрос
+        return WRITE if WRITE_KEYWORDS_RE.search(LITERALS_RE.sub(' ', query)) else READ
+    return WRITE
+
+
+class Statement:
+    """Именованный запрос с заранее определённым видом"""
+
+    __slots__ = ('name', 'sql', 'kind')
+
+    def __init__(self, name, sql, kind=None):
+        self.name = name
+        self.sql = sql
+        self.kind = kind or classify(sql)
+
+
+class StatementRegistry:
+    """Реестр именованных запросов, объявляемых один раз при импорте модулей"""
+
     def __init__(self):
-        self.connection = None
+        self._statements = {}
+
+    def register(self, name, sql, kind=None):
+        """Объявление запроса; повторное объявление с другим текстом - ошибка"""
+        existing = self._statements.get(name)
+        if existing is not None:
+            if existing.sql != sql:
+                raise ValueError(f"Запрос '{name}' уже объявлен с другим текстом")
+            return existing
+
+        statement = Statement(name, sql, kind)
+        self._statements[name] = statement
+        return statement
+
+    def get(self, name):
+        return self._statements[name]
+
+    def __contains__(self, name):
+        return name in self._statements
+
+
+# Общий реестр запросов приложения
+statements = StatementRegistry()
+
+
+class PoolTimeoutError(Error):
+    """Свободное соединение не появилось за отведённое время"""
+
+
+def is_connection_lost(error):
+    """Вызвана ли ошибка потерей соединения (а не самим запросом)"""
+    if isinstance(error, InterfaceError):
+        return True
+    return isinstance(error, OperationalError) and bool(error.args) and error.args[0] in CONNECTION_LOST_ERRORS
+
+
+class ConnectionPool:
+    """Пул соединений с MySQL
+
+    Соединение выдаётся одному потоку за раз: перед выдачей проверяется ping,
+    соединения сверх min_size, простоявшие дольше idle_timeout, закрываются.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=5, idle_timeout=300, checkout_timeout=10):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+
+        self._idle = []  # (соединение, время возврата в пул)
+        self._size = 0  # всего открытых соединений, включая выданные
+        self._closed = False
+        self.reconnects = 0  # сколько раз потерянное соединение заменено новым
+        self._condition = threading.Condition()
+
+        for _ in range(min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    def acquire(self):
+        """Получение соединения из пула"""
+        deadline = time.monotonic() + self.checkout_timeout
+        connection = None
+
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise Error("Пул соединений закрыт")
+
+                self._evict_idle()
+                if self._idle:
+                    connection, _ = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(f"Нет свободного соединения за {self.checkout_timeout} с")
+                self._condition.wait(remaining)
+
+        if connection is not None and self._is_alive(connection):
+            return connection
+
+        # Новое соединение или замена неответившего: место в пуле уже занято
+        if connection is not None:
+            self._close_quietly(connection)
+            with self._condition:
+                self.reconnects += 1
+        try:
+            return self._connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, connection, discard=False):
+        """Возврат соединения в пул; discard - закрыть вместо возврата"""
+        with self._condition:
+            if discard or self._closed:
+                self._size -= 1
+                self._close_quietly(connection)
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """Соединение на время блока with"""
+        connection = self.acquire()
+        try:
+            yield connection
+        except Error:
+            # После ошибки драйвера состояние соединения неизвестно:
+            # потерянное соединение закрывается, следующий запрос получит новое
+            lost = not self._is_alive(connection)
+            if lost:
+                with self._condition:
+                    self.reconnects += 1
+            self.release(connection, discard=lost)
+            raise
+        except BaseException:
+            self.release(connection)
+            raise
+        else:
+            self.release(connection)
+
+    def close(self):
+        """Закрытие всех свободных соединений; выданные закроются при возврате"""
+        with self._condition:
+            self._closed = True
+            for connection, _ in self._idle:
+                self._close_quietly(connection)
+            self._size -= len(self._idle)
+            self._idle = []
+            self._condition.notify_all()
+
+    def _evict_idle(self):
+        """Закрытие давно простаивающих соединений сверх min_size"""
+        now = time.monotonic()
+        # Самые старые соединения лежат в начале списка
+        while (self._idle and self._size > self.min_size
+               and now - self._idle[0][1] > self.idle_timeout):
+            connection, _ = self._idle.pop(0)
+            self._size -= 1
+            self._close_quietly(connection)
+
+    @staticmethod
+    def _is_alive(connection):
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+class Transaction:
+    """Запросы на одном соединении, фиксируемые одним COMMIT (см. Database.transaction)"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, params=None, kind=None):
+        """Выполнение запроса: строки для чтения, lastrowid для остальных"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, params or ())
+            if (kind or classify(query)) == READ:
+                return cursor.fetchall()
+            return cursor.lastrowid
+
+    def execute_named(self, name, params=None):
+        """Выполнение запроса из реестра statements"""
+        statement = statements.get(name)
+        return self.execute(statement.sql, params, statement.kind)
+
+    def execute_many(self, query, params_seq):
+        """Пакетное выполнение запроса (executemany); возвращает число строк"""
+        with self.connection.cursor() as cursor:
+            return cursor.executemany(query, params_seq)
+
+
+class Database:
+    # Повторы чтения после потери соединения: задержка удваивается до RETRY_MAX_DELAY
+    MAX_RETRIES = 4
+    RETRY_BASE_DELAY = 0.05  # с
+    RETRY_MAX_DELAY = 1.0  # с
+
+    def __init__(self, min_size=1, max_size=5, idle_timeout=300, checkout_timeout=10):
+        self.pool = None
+        self.pool_settings = {
+            'min_size': min_size,
+            'max_size': max_size,
+            'idle_timeout': idle_timeout,
+            'checkout_timeout': checkout_timeout,
+        }
+        self.retries = 0
+        self.failed_writes = 0
+        self._lock = threading.Lock()
         self.connect()
 
+    def stats(self):
+        """Счётчики переподключений и повторов запросов"""
+        return {
+            'reconnects': self.pool.reconnects if self.pool else 0,
+            'retries': self.retries,
+            'failed_writes': self.failed_writes,
+        }
+
+    def open_connection(self):
+        """Открытие нового соединения с базой данных"""
+        return pymysql.connect(
+            host='localhost',
+            user='root',
+            password='root',
+            database='demois',
+            charset='utf8mb4',
+            cursorclass=pymysql.cursors.DictCursor,
+            # Каждый запрос - отдельная транзакция: соединение, которое только читает,
+            # не держит снимок REPEATABLE READ и видит изменения других рабочих мест.
+            # Несколько изменений вместе фиксирует transaction()
+            autocommit=True
+        )
+
     def connect(self):
         """Подключение к базе данных"""
         try:
-            self.connection = pymysql.connect(
-                host='localhost',
-                user='root',
-                password='root',
-                database='demois',
-                charset='utf8mb4',
-                cursorclass=pymysql.cursors.DictCursor
-            )
+            self.pool = ConnectionPool(self.open_connection, **self.pool_settings)
             print("✅ База данных подключена!")
             return True
         except Error as e:
             print(f"❌ Ошибка подключения к БД: {e}")
+            self.pool = None
             return False
 
+    def is_connected(self):
+        """Есть ли пул соединений с БД"""
+        return self.pool is not None
+
+    def get_pool(self):
+        """Пул соединений; если БД была недоступна при запуске, подключаемся снова"""
+        if self.pool is None:
+            with self._lock:
+                if self.pool is None:
+                    self.pool = ConnectionPool(self.open_connection, **self.pool_settings)
+        return self.pool
+
+    @contextmanager
+    def checkout(self):
+        """Соединение из пула на время блока with (можно вызывать из любого потока)"""
+        with self.get_pool().connection() as connection:
+            yield connection
+
     def execute_query(self, query, params=None):
         """Выполнение SQL запроса"""
+        return self.execute(query, params, classify(query))
+
+    def execute_named(self, name, params=None):
+        """Выполнение запроса, объявленного в реестре statements
+
+        pymysql не поддерживает серверные prepared statements, поэтому заранее
+        вычисляется всё, что не зависит от параметров: текст и вид запроса.
+        """
+        statement = statements.get(name)
+        return self.execute(statement.sql, params, statement.kind)
+
+    def execute(self, query, params, kind):
+        """Выполнение запроса известного вида
+
+        При потере соединения SELECT повторяется на новом соединении с растущей
+        задержкой. Изменяющий запрос повторяется, только если он не был отправлен
+        на сервер, иначе возвращается None: неизвестно, был ли он применён.
+        Для чтения возвращаются строки, для остальных запросов - lastrowid.
+        """
+        is_select = kind == READ
+        attempt = 0
+
+        while True:
+            sent = False
+            try:
+                with self.checkout() as connection:
+                    sent = True
+                    try:
+                        with connection.cursor() as cursor:
+                            cursor.execute(query, params or ())
+
+                            if is_select:
+                                result = cursor.fetchall()
+                                return result
+                            else:
+                                # Запись уже зафиксирована (autocommit)
+                                return cursor.lastrowid
+
+                    except Error:
+                        try:
+                            connection.rollback()
+                        except Error:
+                            pass
+                        raise
+
+            except Error as e:
+                if not is_connection_lost(e):
+                    print(f"❌ Ошибка запроса: {e}")
+                    return None
+
+                if sent and not is_select:
+                    with self._lock:
+                        self.failed_writes += 1
+                    print(f"❌ Соединение потеряно во время записи, запрос не повторяется: {e}")
+                    return None
+
+                if attempt >= self.MAX_RETRIES:
+                    print(f"❌ Ошибка запроса после {attempt} повторов: {e}")
+                    return None
+
+                time.sleep(min(self.RETRY_BASE_DELAY * 2 ** attempt, self.RETRY_MAX_DELAY))
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+
+    def stream_query(self, query, params=None, batch_size=500):
+        """Генератор строк SELECT без загрузки всего результата в память
+
+        Используется небуферизованный курсор (SSDictCursor): строки читаются с сервера
+        пачками по batch_size по мере перебора. Соединение занято до конца перебора;
+        если перебор прерван, соединение закрывается, а не возвращается в пул
+        (непрочитанный остаток результата сделал бы его непригодным).
+        """
+        pool = self.get_pool()
+        connection = pool.acquire()
+        cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+        completed = False
         try:
-            with self.connection.cursor() as cursor:
-                cursor.execute(query, params or ())
+            cursor.execute(query, params or ())
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+            completed = True
+        finally:
+            if completed:
+                cursor.close()
+                pool.release(connection)
+            else:
+                # cursor.close() дочитал бы с сервера весь остаток результата;
+                # закрытое соединение прерывает запрос без передачи оставшихся строк
+                pool.release(connection, discard=True)
+
+    def stream_named(self, name, params=None, batch_size=500):
+        """Потоковое чтение запроса из реестра statements"""
+        return self.stream_query(statements.get(name).sql, params, batch_size)
 
-                if query.strip().upper().startswith('SELECT'):
-                    result = cursor.fetchall()
-                    return result
-                else:
-                    self.connection.commit()
-                    return cursor.lastrowid
+    @contextmanager
+    def transaction(self):
+        """Транзакция: все запросы блока with фиксируются вместе или откатываются
 
+        Ошибки не перехватываются, а передаются вызывающему коду после отката.
+        """
+        with self.checkout() as connection:
+            connection.begin()
+            try:
+                yield Transaction(connection)
+            except BaseException:
+                try:
+                    connection.rollback()
+                except Error:
+                    pass
+                raise
+            else:
+                connection.commit()
+
+    def execute_many(self, query, params_seq):
+        """Пакетная запись одной транзакцией; число затронутых строк или None при ошибке"""
+        try:
+            with self.transaction() as transaction:
+                return transaction.execute_many(query, params_seq)
         except Error as e:
-            print(f"❌ Ошибка запроса: {e}")
-            self.connection.rollback()
+            print(f"❌ Ошибка пакетного запроса: {e}")
             return None
 
     def close(self):
         """Закрытие соединения с БД"""
-        if self.connection:
-            self.connection.close()
-            print("🔌 Соединение с БД закрыто")
\ No newline at end of file
+        if self.pool:
+            self.pool.close()
+            self.pool = None
+            print("🔌 Соединение с БД закрыто")
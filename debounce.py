@@ -0,0 +1,44 @@
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+
+class Debouncer(QObject):
+    """Откладывает запуск до паузы во вводе и отбрасывает устаревшие запуски"""
+
+    DEFAULT_DELAY = 300  # мс
+
+    ran = pyqtSignal(int, int)  # выполнено запусков, пропущено устаревших
+
+    def __init__(self, callback, delay=DEFAULT_DELAY, parent=None):
+        super().__init__(parent)
+        self.callback = callback
+        self.delay = delay
+        self.skipped = 0  # сколько запусков поглощено более новым вводом
+        self.runs = 0
+        self._pending = False
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._run)
+
+    def trigger(self, *_):
+        """Запросить запуск; предыдущий ещё не выполненный запрос отменяется
+
+        Аргументы сигнала (текст, индекс) игнорируются, чтобы метод можно было
+        подключать к любому сигналу изменения фильтра.
+        """
+        if self._pending:
+            self.skipped += 1
+        self._pending = True
+        self._timer.start(self.delay)
+
+    def flush(self):
+        """Немедленно выполнить отложенный запуск, если он есть (например, по Enter)"""
+        if self._pending:
+            self._timer.stop()
+            self._run()
+
+    def _run(self):
+        self._pending = False
+        self.runs += 1
+        self.callback()
+        self.ran.emit(self.runs, self.skipped)
@@ -0,0 +1,237 @@
+from PyQt6.QtCore import QObject, QThreadPool, QTimer, QEvent, pyqtSignal
+from PyQt6.QtGui import QColor, QImage, QPixmap
+from PIL import Image
+from background import BackgroundLoader
+from collections import OrderedDict
+import os
+
+
+# Размеры миниатюр: таблица, предпросмотр в форме, сохраняемое изображение товара
+THUMBNAIL_SIZES = {
+    'small': (64, 48),
+    'medium': (150, 100),
+    'large': (300, 200),
+}
+
+
+PLACEHOLDER_COLOR = QColor('#E0E0E0')
+
+
+def open_scaled(path, size):
+    """Открытие изображения, уменьшенного не больше чем до size
+
+    JPEG декодируется в draft-режиме сразу в уменьшенном масштабе (в 2-8 раз
+    быстрее полного декодирования), затем Image.thumbnail сохраняет пропорции.
+    """
+    with Image.open(path) as source:
+        source.draft('RGB', size)
+        img = source.convert('RGBA')
+    img.thumbnail(size)
+    return img
+
+
+def to_qimage(img):
+    """QImage из изображения PIL; можно создавать вне потока GUI, в отличие от QPixmap"""
+    img = img.convert('RGBA')
+    data = img.tobytes('raw', 'RGBA')
+    # copy(): QImage получает собственный буфер, не зависящий от data
+    return QImage(data, img.width, img.height, img.width * 4, QImage.Format.Format_RGBA8888).copy()
+
+
+def render_thumbnails(path):
+    """Все размеры миниатюр из одного декодирования файла (выполняется в пуле потоков)"""
+    largest = (max(width for width, _ in THUMBNAIL_SIZES.values()),
+               max(height for _, height in THUMBNAIL_SIZES.values()))
+    with open_scaled(path, largest) as img:
+        thumbnails = {}
+        for name, size in THUMBNAIL_SIZES.items():
+            thumbnail = img.copy()
+            thumbnail.thumbnail(size)
+            thumbnails[name] = to_qimage(thumbnail)
+        return thumbnails
+
+
+class ImageCache(QObject):
+    """Миниатюры изображений товаров: декодирование в пуле потоков и LRU-кэш QPixmap
+
+    Ключ кэша - путь и размер: файлы хранилища названы по своему содержимому
+    (ImageStore) и не перезаписываются, поэтому при отрисовке диск не
+    проверяется. Удалённый файл убирается из кэша вызовом invalidate().
+    Один файл декодируется один раз для всех размеров, повторные запросы уже
+    загружаемого файла ждут ту же задачу.
+    """
+
+    MAX_ITEMS = 600
+
+    ready = pyqtSignal(str)  # путь, для которого готовы миниатюры
+    failed = pyqtSignal(str)
+
+    def __init__(self, max_items=MAX_ITEMS, thread_pool=None, parent=None):
+        super().__init__(parent)
+        self.max_items = max_items
+        if thread_pool is None:
+            # Отдельный пул: декодирование не задерживает запросы к БД
+            thread_pool = QThreadPool(self)
+            thread_pool.setMaxThreadCount(max(2, QThreadPool.globalInstance().maxThreadCount() - 1))
+        self.loader = BackgroundLoader(self, thread_pool)
+        self.hits = 0
+        self.misses = 0
+        self._pixmaps = OrderedDict()  # (путь, размер) -> QPixmap
+        self._pending = {}  # путь -> номер задачи
+        self._failed = set()  # пути файлов, которые не удалось декодировать
+
+    def pixmap(self, path, size='small'):
+        """Миниатюра из кэша или None (без загрузки и обращений к диску)"""
+        pixmap = self._pixmaps.get((path, size))
+        if pixmap is not None:
+            self._pixmaps.move_to_end((path, size))
+        return pixmap
+
+    def request(self, path, size='small'):
+        """Миниатюра из кэша; если её нет - фоновая загрузка и None
+
+        Когда загрузка закончится, придёт сигнал ready(path).
+        """
+        pixmap = self.pixmap(path, size)
+        if pixmap is not None:
+            self.hits += 1
+            return pixmap
+
+        if path in self._pending or path in self._failed:
+            return None
+        # Наличие файла проверяется только при промахе кэша
+        if not path or not os.path.isfile(path):
+            return None
+        self.misses += 1
+        self._pending[path] = self.loader.run(
+            lambda: render_thumbnails(path),
+            lambda images: self._on_rendered(path, images),
+            lambda message: self._on_failed(path, message)
+        )
+        return None
+
+    def is_loading(self, path):
+        return path in self._pending
+
+    def cancel(self, path):
+        """Отмена ещё не начатой загрузки (например, строка ушла из видимой области)"""
+        task_id = self._pending.pop(path, None)
+        if task_id is not None:
+            self.loader.discard(task_id)
+
+    def invalidate(self, path):
+        """Удаление миниатюр файла из кэша (файл удалён)"""
+        for key in [key for key in self._pixmaps if key[0] == path]:
+            del self._pixmaps[key]
+        self._failed.discard(path)
+        self.cancel(path)
+
+    def _on_rendered(self, path, images):
+        self._pending.pop(path, None)
+        for size, image in images.items():
+            # QPixmap создаётся только в потоке GUI
+            self._pixmaps[(path, size)] = QPixmap.fromImage(image)
+        while len(self._pixmaps) > self.max_items:
+            self._pixmaps.popitem(last=False)
+        self.ready.emit(path)
+
+    def _on_failed(self, path, message):
+        self._pending.pop(path, None)
+        self._failed.add(path)
+        print(f"❌ Ошибка загрузки изображения {path}: {message}")
+        self.failed.emit(path)
+
+
+class ViewportThumbnails(QObject):
+    """Загрузка миниатюр только для строк, видимых в таблице
+
+    После прокрутки, изменения размера или данных таблицы (с задержкой DELAY,
+    чтобы не реагировать на каждый шаг прокрутки) запрашиваются миниатюры
+    видимых строк, а ещё не начатые загрузки ушедших из вида строк отменяются.
+    Модель должна иметь метод image_path(row); готовая миниатюра
+    перерисовывает только свою ячейку.
+    """
+
+    DELAY = 50  # мс
+
+    def __init__(self, view, column, size='small', cache=None):
+        super().__init__(view)
+        self.view = view
+        self.column = column
+        self.size = size
+        self.cache = cache or image_cache()
+        self._requested = set()  # пути видимых строк, которые сейчас загружаются
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.update)
+
+        model = view.model()
+        for signal in (model.modelReset, model.layoutChanged, model.rowsInserted,
+                       model.rowsRemoved, model.dataChanged):
+            signal.connect(self.schedule)
+        view.verticalScrollBar().valueChanged.connect(self.schedule)
+        view.viewport().installEventFilter(self)
+        self.cache.ready.connect(self.on_ready)
+
+    def schedule(self, *_):
+        self._timer.start(self.DELAY)
+
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.Type.Resize, QEvent.Type.Show):
+            self.schedule()
+        return False
+
+    def visible_rows(self):
+        """Номера строк, попадающих в область просмотра"""
+        top = self.view.rowAt(0)
+        if top < 0:
+            return range(0)
+        bottom = self.view.rowAt(self.view.viewport().height() - 1)
+        if bottom < 0:
+            bottom = self.view.model().rowCount() - 1
+        return range(top, bottom + 1)
+
+    def update(self):
+        model = self.view.model()
+        paths = {path for path in map(model.image_path, self.visible_rows()) if path}
+
+        for path in self._requested - paths:
+            self.cache.cancel(path)
+        self._requested = {path for path in paths
+                           if self.cache.request(path, self.size) is None and self.cache.is_loading(path)}
+
+    def clear(self):
+        """Отмена всех загрузок (например, окно скрыто)"""
+        self._timer.stop()
+        for path in self._requested:
+            self.cache.cancel(path)
+        self._requested = set()
+
+    def on_ready(self, path):
+        self._requested.discard(path)
+        model = self.view.model()
+        for row in self.visible_rows():
+            if model.image_path(row) == path:
+                self.view.update(model.index(row, self.column))
+
+
+_cache = None
+_placeholders = {}
+
+
+def image_cache():
+    """Общий для всех окон кэш миниатюр"""
+    global _cache
+    if _cache is None:
+        _cache = ImageCache()
+    return _cache
+
+
+def placeholder(size='small'):
+    """Заглушка на месте ещё не загруженной миниатюры"""
+    pixmap = _placeholders.get(size)
+    if pixmap is None:
+        pixmap = _placeholders[size] = QPixmap(*THUMBNAIL_SIZES[size])
+        pixmap.fill(PLACEHOLDER_COLOR)
+    return pixmap
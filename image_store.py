@@ -0,0 +1,130 @@
+from PIL import Image, features
+from database import statements
+from image_cache import THUMBNAIL_SIZES, open_scaled
+import hashlib
+import io
+import os
+import threading
+import time
+
+
+statements.register('image_references', "SELECT COUNT(*) AS count FROM products WHERE image_path = %s")
+
+
+class ImageStore:
+    """Хранилище изображений товаров с адресацией по содержимому
+
+    Файл называется по SHA-256 своего содержимого (root/ab/abcd....webp), поэтому
+    одинаковые изображения разных товаров хранятся и записываются один раз, а
+    повторный выбор той же картинки не перезаписывает файл. Изображения
+    сохраняются в WebP (или JPEG, если Pillow собран без WebP).
+
+    Файл может использоваться несколькими товарами, поэтому вместо удаления
+    вызывается release(): путь становится кандидатом на удаление, а collect()
+    удаляет только файлы, на которые не ссылается ни один товар в БД.
+    Недавно записанные файлы (моложе GRACE секунд) не удаляются: их может
+    использовать ещё не сохранённая форма.
+    """
+
+    ROOT = 'product_images'
+    QUALITY = 85
+    GRACE = 600  # секунд
+
+    def __init__(self, root=ROOT, image_format=None, quality=QUALITY, grace=GRACE):
+        self.root = root
+        self.format = image_format or ('WEBP' if features.check('webp') else 'JPEG')
+        self.extension = '.webp' if self.format == 'WEBP' else '.jpg'
+        self.quality = quality
+        self.grace = grace
+        self.written = 0
+        self.deduplicated = 0
+        self._candidates = set()  # пути, на которые могли перестать ссылаться товары
+        self._lock = threading.Lock()
+
+    def encode(self, img):
+        """Сжатое изображение в байтах"""
+        if self.format == 'JPEG' and img.mode != 'RGB':
+            # В JPEG нет прозрачности - накладываем на белый фон
+            background = Image.new('RGB', img.size, 'white')
+            background.paste(img, mask=img.getchannel('A') if 'A' in img.getbands() else None)
+            img = background
+        buffer = io.BytesIO()
+        img.save(buffer, self.format, quality=self.quality)
+        return buffer.getvalue()
+
+    def path_for(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        return os.path.join(self.root, digest[:2], digest + self.extension)
+
+    def store(self, source_path, size=THUMBNAIL_SIZES['large']):
+        """Уменьшение и сохранение изображения; путь в хранилище (выполняется в пуле потоков)"""
+        with open_scaled(source_path, size) as img:
+            data = self.encode(img)
+        path = self.path_for(data)
+
+        with self._lock:
+            self._candidates.discard(path)
+            if os.path.exists(path):
+                # Такое изображение уже есть - только продлеваем его защиту от удаления
+                os.utime(path)
+                self.deduplicated += 1
+                return path
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as file:
+                file.write(data)
+            # Файл появляется под своим именем только целиком
+            os.replace(temp_path, path)
+            self.written += 1
+        return path
+
+    def release(self, path):
+        """Товар перестал ссылаться на изображение; файл удалит collect(), если он больше не нужен"""
+        if path:
+            with self._lock:
+                self._candidates.add(path)
+
+    def collect(self, db):
+        """Удаление изображений-кандидатов, на которые не ссылается ни один товар
+
+        Возвращает список удалённых путей. Выполняется в пуле потоков.
+        """
+        with self._lock:
+            candidates = list(self._candidates)
+
+        removed = []
+        for path in candidates:
+            result = db.execute_named('image_references', (path,))
+            if result is None:
+                continue  # проверим при следующей сборке
+            referenced = result[0]['count'] > 0
+
+            with self._lock:
+                if path not in self._candidates:
+                    continue  # изображение снова сохранено, пока шла проверка
+                if referenced or not self.owns(path) or not os.path.exists(path):
+                    self._candidates.discard(path)
+                    continue
+                if time.time() - os.path.getmtime(path) < self.grace:
+                    continue
+                try:
+                    os.remove(path)
+                    removed.append(path)
+                except OSError as e:
+                    print(f"❌ Ошибка удаления файла {path}: {e}")
+                self._candidates.discard(path)
+        return removed
+
+    def owns(self, path):
+        """Лежит ли файл в каталоге хранилища (файлы вне его не удаляются)"""
+        root = os.path.abspath(self.root)
+        return os.path.commonpath([root, os.path.abspath(path)]) == root
+
+    def stats(self):
+        with self._lock:
+            return {'written': self.written, 'deduplicated': self.deduplicated,
+                    'candidates': len(self._candidates)}
+
+
+image_store = ImageStore()
@@ -6,9 +6,11 @@ import sys
 
 
 class RoleSelectionWindow(QWidget):
-    def __init__(self):
+    def __init__(self, db=None, session=None):
         super().__init__()
-        self.db = Database()
+        # Подключение передаётся при возврате к выбору роли, новое создаётся только при запуске
+        self.db = db or Database()
+        self.session = session
         self.setup_ui()
 
     def setup_ui(self):
@@ -105,6 +107,8 @@ class RoleSelectionWindow(QWidget):
         if role == "Гость":
             # Для гостя сразу открываем окно товаров с передачей базы данных
             self.open_products_window("Гость", None, "Гость")
+        elif self.session:
+            self.session.show_login(role)
         else:
             # Для других ролей открываем окно авторизации
             self.login_window = LoginWindow(role, self.db)
@@ -113,16 +117,20 @@ class RoleSelectionWindow(QWidget):
 
     def open_products_window(self, role, user_id, user_name):
         """Открывает окно с товарами с учетом роли"""
+        if self.session:
+            self.session.start_session(role, user_id, user_name)
+            return
         self.products_window = ProductsWindow(role, user_id, user_name, self.db)
         self.products_window.show()
         self.close()
 
 
 class LoginWindow(QWidget):
-    def __init__(self, role, db):
+    def __init__(self, role, db, session=None):
         super().__init__()
         self.role = role
         self.db = db
+        self.session = session
         self.setup_ui()
 
     def setup_ui(self):
@@ -200,7 +208,7 @@ class LoginWindow(QWidget):
             QMessageBox.warning(self, "Ошибка", "Заполните все поля!")
             return
 
-        if not self.db.connection:
+        if not self.db.is_connected():
             QMessageBox.critical(self, "Ошибка", "Нет подключения к БД!")
             return
 
@@ -234,20 +242,30 @@ class LoginWindow(QWidget):
 
     def go_back(self):
         """Возврат к выбору роли"""
+        if self.session:
+            self.session.show_role_selection()
+            return
         from main import RoleSelectionWindow
-        self.role_window = RoleSelectionWindow()
+        self.role_window = RoleSelectionWindow(self.db)
         self.role_window.show()
         self.close()
 
     def open_products_window(self, role, user_id, user_name):
         """Открывает окно с товарами с учетом роли"""
+        if self.session:
+            self.session.start_session(role, user_id, user_name)
+            return
         self.products_window = ProductsWindow(role, user_id, user_name, self.db)
         self.products_window.show()
         self.close()
 
 
 if __name__ == "__main__":
+    from session import SessionManager
+
     app = QApplication(sys.argv)
-    window = RoleSelectionWindow()
-    window.show()
+    # Окна и подключение к БД живут всю сессию, переходы только переключают окна
+    session = SessionManager()
+    app.aboutToQuit.connect(session.close)
+    session.show_role_selection()
     sys.exit(app.exec())
\ No newline at end of file
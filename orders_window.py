@@ -1,24 +1,108 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QLabel, QTableWidget, QTableWidgetItem,
-                             QHeaderView, QPushButton, QMessageBox,
+                             QLabel, QTableView, QHeaderView, QPushButton, QMessageBox,
                              QLineEdit, QComboBox, QDialog, QFormLayout,
                              QDateEdit, QDialogButtonBox)
-from PyQt6.QtCore import Qt, QDate
-from PyQt6.QtGui import QColor
+from PyQt6.QtCore import Qt, QDate, pyqtSignal
+from table_models import OrdersTableModel, ActionsDelegate
+from debounce import Debouncer
+from database import statements
+from background import BackgroundLoader, LoadingIndicator
+from row_store import OrderRecord, as_records
+from change_feed import WindowSync, DELETE
+from reference_data import reference_data
+from reference_models import reference_model
+from bisect import bisect_left, bisect_right
+
+
+ORDERS_SELECT = """
+                    SELECT o.receipt_code, \
+                           o.order_status, \
+                           CONCAT(tp.city, ', ', tp.street, ', д. ', tp.num_house) as pickup_address, \
+                           o.order_date, \
+                           o.delivery_date, \
+                           CONCAT(u.u_name, ' ', u.surname)                        as client_name, \
+                           o.id, \
+                           o.pickup_point_id, \
+                           o.client_id
+                    FROM orders o
+                             LEFT JOIN take_points tp ON o.pickup_point_id = tp.id
+                             LEFT JOIN users u ON o.client_id = u.id \
+                    """
+statements.register('load_orders', ORDERS_SELECT + " ORDER BY o.order_date DESC")
+# Один заказ по id для точечного обновления кэша
+statements.register('load_order', ORDERS_SELECT + " WHERE o.id = %s")
+statements.register('count_orders', "SELECT COUNT(*) AS count FROM orders")
+statements.register('delete_order_items', "DELETE FROM order_items WHERE order_id = %s")
+statements.register('delete_order', "DELETE FROM orders WHERE id = %s")
+# Артикул заказа выдаёт триггер trg_orders_receipt_code из счётчика sequences
+statements.register('insert_order', """
+                    INSERT INTO orders
+                    (order_status, pickup_point_id, client_id, order_date, delivery_date)
+                    VALUES (%s, %s, %s, %s, %s)
+                    """)
+
+
+def order_sort_key(order):
+    """Ключ по возрастанию для порядка ORDER BY order_date DESC (без даты - в конце)"""
+    order_date = order.get('order_date')
+    return -order_date.toordinal() if order_date else 0
+
+
+def sorted_row(orders, order):
+    """Позиция заказа в списке, упорядоченном по дате, с сохранением порядка"""
+    return bisect_right(orders, order_sort_key(order), key=order_sort_key)
+
+
+def to_qdate(value):
+    """QDate из даты MySQL (datetime.date) или строки в формате ISO"""
+    if isinstance(value, str):
+        return QDate.fromString(value, Qt.DateFormat.ISODate)
+    return QDate(value.year, value.month, value.day)
+
+
+def order_row(orders, order):
+    """Позиция заказа (того же объекта) в списке, упорядоченном по дате, или None
+
+    Двоичным поиском находятся заказы с той же датой, перебираются только они.
+    """
+    key = order_sort_key(order)
+    first = bisect_left(orders, key, key=order_sort_key)
+    for row in range(first, bisect_right(orders, key, first, key=order_sort_key)):
+        if orders[row] is order:
+            return row
+    return None
 
 
 class OrdersWindow(QMainWindow):
-    def __init__(self, role, user_id, user_name, db):
+    # Пауза во вводе (мс), после которой применяются фильтры
+    FILTER_DELAY = Debouncer.DEFAULT_DELAY
+
+    def __init__(self, role, user_id, user_name, db, session=None):
         super().__init__()
         self.role = role
         self.user_id = user_id
         self.user_name = user_name
         self.db = db
+        self.session = session  # SessionManager: переходы между окнами без их пересоздания
         self.all_orders = []
+        self.orders_by_id = {}  # id -> заказ из all_orders, по его дате ищется строка
+        self.dialog = None  # переиспользуемый диалог заказа
+        self.filter_debouncer = Debouncer(self.apply_filters, self.FILTER_DELAY, self)
+        # Запросы выполняются в фоне, окно показывается сразу
+        self.loader = BackgroundLoader(self)
+        self.filters_pending = False
+        # Изменения с других рабочих мест и изменения справочников
+        self.sync = WindowSync(self, 'orders', self.apply_changes)
 
         self.setup_ui()
         self.load_orders()
 
+        if self.role == "Администратор":
+            # Справочники формы заказа загружаются заранее, в фоне
+            self.loader.run(lambda: reference_data.prefetch(self.db, 'pickup_points', 'clients'),
+                            lambda result: None,
+                            lambda message: print(f"❌ Ошибка загрузки справочников: {message}"))
+
     def setup_ui(self):
         """Создание интерфейса окна заказов"""
         self.setWindowTitle(f"Заказы - {self.role}")
@@ -59,14 +143,16 @@ class OrdersWindow(QMainWindow):
             filters_layout.addWidget(QLabel("Поиск:"))
             self.search_input = QLineEdit()
             self.search_input.setPlaceholderText("Поиск по артикулу заказа...")
-            self.search_input.textChanged.connect(self.apply_filters)
+            self.search_input.textChanged.connect(self.filter_debouncer.trigger)
+            self.search_input.returnPressed.connect(self.filter_debouncer.flush)
+            self.filter_debouncer.ran.connect(self.show_filter_stats)
             filters_layout.addWidget(self.search_input)
 
             # Фильтр по статусу
             filters_layout.addWidget(QLabel("Статус:"))
             self.status_filter = QComboBox()
             self.status_filter.addItems(["Все статусы", "Новый", "Завершен"])
-            self.status_filter.currentTextChanged.connect(self.apply_filters)
+            self.status_filter.currentTextChanged.connect(self.filter_debouncer.trigger)
             filters_layout.addWidget(self.status_filter)
 
             filters_layout.addStretch()
@@ -78,121 +164,69 @@ class OrdersWindow(QMainWindow):
         layout.addWidget(title)
 
         # Таблица заказов
-        self.orders_table = QTableWidget()
-        if self.role == "Администратор":
-            self.orders_table.setColumnCount(7)
-            self.orders_table.setHorizontalHeaderLabels([
-                "Артикул заказа",
-                "Статус заказа",
-                "Адрес пункта выдачи",
-                "Дата заказа",
-                "Дата доставки",
-                "Клиент",
-                "Действия"
-            ])
-        else:
-            self.orders_table.setColumnCount(5)
-            self.orders_table.setHorizontalHeaderLabels([
-                "Артикул заказа",
-                "Статус заказа",
-                "Адрес пункта выдачи",
-                "Дата заказа",
-                "Дата доставки"
-            ])
+        self.orders_model = OrdersTableModel(self.role, self)
+        self.orders_table = QTableView()
+        self.orders_table.setModel(self.orders_model)
+
+        # Кнопки действий рисуются делегатом, а не виджетом в каждой строке
+        actions_col = self.orders_model.actions_column()
+        if actions_col >= 0:
+            self.actions_delegate = ActionsDelegate(self.orders_table)
+            self.actions_delegate.edit_clicked.connect(
+                lambda row: self.edit_order(self.orders_model.order_at(row)))
+            self.actions_delegate.delete_clicked.connect(
+                lambda row: self.delete_order(self.orders_model.order_at(row)))
+            self.orders_table.setItemDelegateForColumn(actions_col, self.actions_delegate)
 
         self.orders_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.orders_table.setAlternatingRowColors(True)
 
         layout.addWidget(self.orders_table)
+        layout.addWidget(LoadingIndicator(self.loader))
 
         central_widget.setLayout(layout)
 
     def load_orders(self):
-        """Загрузка всех заказов из базы данных"""
+        """Фоновая загрузка всех заказов частями"""
         try:
-            query = """
-                    SELECT o.receipt_code, \
-                           o.order_status, \
-                           CONCAT(tp.city, ', ', tp.street, ', д. ', tp.num_house) as pickup_address, \
-                           o.order_date, \
-                           o.delivery_date, \
-                           CONCAT(u.u_name, ' ', u.surname)                        as client_name, \
-                           o.id
-                    FROM orders o
-                             LEFT JOIN take_points tp ON o.pickup_point_id = tp.id
-                             LEFT JOIN users u ON o.client_id = u.id
-                    ORDER BY o.order_date DESC \
-                    """
-
-            orders = self.db.execute_query(query)
-
-            if orders is None:
-                QMessageBox.warning(self, "Ошибка", "Не удалось загрузить заказы")
-                return
-
-            self.all_orders = orders
+            self.all_orders = []
+            self.orders_by_id = {}
+            self.sync.reset()
             self.display_orders(self.all_orders)
+            # Заказы читаются потоково и показываются по мере получения строк
+            self.loader.load(lambda: as_records(self.db.stream_named('load_orders'), OrderRecord),
+                             self.on_orders_chunk, self.on_orders_loaded, self.on_orders_failed,
+                             count=self.count_orders, on_cancel=self.on_orders_loaded)
 
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Ошибка загрузки заказов: {str(e)}")
             print(f"❌ Ошибка в load_orders: {e}")
 
+    def count_orders(self):
+        """Количество заказов (выполняется в фоне)"""
+        result = self.db.execute_named('count_orders')
+        return result[0]['count'] if result else None
+
+    def on_orders_chunk(self, orders):
+        """Очередная часть загруженных заказов сразу появляется в таблице"""
+        self.orders_by_id.update((order.get('id'), order) for order in orders)
+        self.orders_model.append_orders(orders)
+
+    def on_orders_loaded(self):
+        """Загрузка завершена (или отменена): применяем изменения и фильтры, пришедшие во время загрузки"""
+        self.sync.flush()
+        if self.filters_pending:
+            self.filters_pending = False
+            self.apply_filters()
+
+    def on_orders_failed(self, message):
+        QMessageBox.warning(self, "Ошибка", "Не удалось загрузить заказы")
+        print(f"❌ Ошибка в load_orders: {message}")
+
     def display_orders(self, orders):
         """Отображение заказов в таблице"""
         try:
-            self.orders_table.setRowCount(len(orders))
-
-            for row, order in enumerate(orders):
-                # Безопасно получаем значения
-                receipt_code = str(order.get('receipt_code', ''))
-                order_status = str(order.get('order_status', ''))
-                pickup_address = str(order.get('pickup_address', ''))
-                order_date = str(order.get('order_date', ''))
-                delivery_date = str(order.get('delivery_date', ''))
-                client_name = str(order.get('client_name', ''))
-                order_id = order.get('id')
-
-                # Артикул заказа
-                self.orders_table.setItem(row, 0, QTableWidgetItem(receipt_code))
-
-                # Статус заказа
-                status_item = QTableWidgetItem(order_status)
-                if order_status == 'Завершен':
-                    status_item.setBackground(QColor('#90EE90'))  # Светло-зеленый
-                elif order_status == 'Новый':
-                    status_item.setBackground(QColor('#FFB6C1'))  # Светло-розовый
-                self.orders_table.setItem(row, 1, status_item)
-
-                # Адрес пункта выдачи
-                self.orders_table.setItem(row, 2, QTableWidgetItem(pickup_address))
-
-                # Дата заказа
-                self.orders_table.setItem(row, 3, QTableWidgetItem(order_date))
-
-                # Дата доставки
-                delivery_item = QTableWidgetItem(delivery_date)
-                self.orders_table.setItem(row, 4, delivery_item)
-
-                # Для администратора добавляем клиента и действия
-                if self.role == "Администратор":
-                    # Клиент
-                    self.orders_table.setItem(row, 5, QTableWidgetItem(client_name))
-
-                    # Действия
-                    actions_widget = QWidget()
-                    actions_layout = QHBoxLayout()
-                    actions_layout.setContentsMargins(0, 0, 0, 0)
-
-                    edit_btn = QPushButton("Редактировать")
-                    edit_btn.clicked.connect(lambda checked, o=order: self.edit_order(o))
-                    actions_layout.addWidget(edit_btn)
-
-                    delete_btn = QPushButton("Удалить")
-                    delete_btn.clicked.connect(lambda checked, o=order: self.delete_order(o))
-                    actions_layout.addWidget(delete_btn)
-
-                    actions_widget.setLayout(actions_layout)
-                    self.orders_table.setCellWidget(row, 6, actions_widget)
+            self.orders_model.set_orders(orders)
 
         except Exception as e:
             print(f"❌ Ошибка в display_orders: {e}")
@@ -200,29 +234,16 @@ class OrdersWindow(QMainWindow):
     def apply_filters(self):
         """Применение фильтров и поиска"""
         try:
-            if not self.all_orders:
+            if self.loader.is_loading():
+                # Заказы ещё загружаются - фильтры применятся по окончании
+                self.filters_pending = True
                 return
 
-            # Получаем текущие значения фильтров
-            search_text = self.search_input.text().lower()
-            status_filter = self.status_filter.currentText()
-
-            # Начинаем со всех заказов
-            filtered_orders = self.all_orders.copy()
-
-            # Применяем поиск
-            if search_text:
-                filtered_orders = [
-                    o for o in filtered_orders
-                    if search_text in str(o.get('receipt_code', '')).lower()
-                ]
+            if not self.all_orders:
+                return
 
-            # Применяем фильтр по статусу
-            if status_filter != "Все статусы":
-                filtered_orders = [
-                    o for o in filtered_orders
-                    if o.get('order_status') == status_filter
-                ]
+            # Поиск по номеру и фильтр по статусу
+            filtered_orders = [o for o in self.all_orders if self.order_matches(o)]
 
             # Отображаем отфильтрованные заказы
             self.display_orders(filtered_orders)
@@ -230,17 +251,109 @@ class OrdersWindow(QMainWindow):
         except Exception as e:
             print(f"❌ Ошибка в apply_filters: {e}")
 
+    def show_filter_stats(self, runs, skipped):
+        """Сколько фильтраций выполнено и сколько поглощено более новым вводом"""
+        self.search_input.setToolTip(f"Фильтраций: {runs}, пропущено устаревших: {skipped}")
+
+    def order_matches(self, order):
+        """Проходит ли заказ текущие поиск и фильтр по статусу"""
+        search_text = self.search_input.text().lower()
+        if search_text and search_text not in str(order.get('receipt_code', '')).lower():
+            return False
+        status_filter = self.status_filter.currentText()
+        return status_filter == "Все статусы" or order.get('order_status') == status_filter
+
+    def order_saved(self, order_id):
+        """Точечное обновление кэша после добавления или изменения заказа
+
+        Загружается одна строка по id; заказ встаёт на своё место по дате,
+        перерисовывается только его строка.
+        """
+        if self.loader.is_loading():
+            # Заказ может прийти и в ещё не загруженной части - перезапускаем загрузку
+            self.load_orders()
+            return
+
+        rows = self.db.execute_named('load_order', (order_id,))
+        if rows is None:
+            # Не удалось получить заказ - перечитываем список целиком
+            self.load_orders()
+            return
+        if not rows:
+            self.order_removed(order_id)
+            return
+
+        order = OrderRecord.from_row(rows[0])
+        shown = self.orders_model.orders()
+        cached = self.orders_by_id.get(order_id)
+        self.orders_by_id[order_id] = order
+        # Строка ищется по дате прежней версии заказа
+        row = order_row(shown, cached) if cached is not None else None
+
+        # Без фильтров кэш - это и есть показанный список
+        if shown is not self.all_orders:
+            if cached is not None:
+                del self.all_orders[order_row(self.all_orders, cached)]
+            self.all_orders.insert(sorted_row(self.all_orders, order), order)
+
+        if not self.order_matches(order):
+            if row is not None:
+                self.orders_model.remove_order(row)
+            if shown is self.all_orders:
+                # Строка удалена и из кэша
+                del self.orders_by_id[order_id]
+        elif row is not None and order_sort_key(shown[row]) == order_sort_key(order):
+            self.orders_model.update_order(row, order)
+        else:
+            if row is not None:
+                self.orders_model.remove_order(row)
+            self.orders_model.insert_order(sorted_row(shown, order), order)
+
+    def order_removed(self, order_id):
+        """Точечное удаление заказа из кэша и таблицы"""
+        if self.loader.is_loading():
+            self.load_orders()
+            return
+
+        cached = self.orders_by_id.pop(order_id, None)
+        if cached is None:
+            return
+
+        if self.orders_model.orders() is not self.all_orders:
+            del self.all_orders[order_row(self.all_orders, cached)]
+
+        row = order_row(self.orders_model.orders(), cached)
+        if row is not None:
+            self.orders_model.remove_order(row)
+
+    def apply_changes(self, changes):
+        """Применение пакета изменений {id заказа: действие} из журнала к кэшу и таблице"""
+        for key, action in changes.items():
+            if action == DELETE:
+                self.order_removed(int(key))
+            else:
+                self.order_saved(int(key))
+
+    def order_dialog(self, order=None):
+        """Диалог заказа: создаётся при первом открытии и затем переиспользуется"""
+        if self.dialog is None:
+            self.dialog = OrderDialog(self.db, self, order)
+            self.dialog.saved.connect(self.sync.skip)
+        else:
+            self.dialog.set_order(order)
+        return self.dialog
+
     def add_order(self):
         """Добавление нового заказа"""
-        dialog = OrderDialog(self.db, self)
+        dialog = self.order_dialog()
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_orders()  # Обновляем список
+            self.order_saved(dialog.saved_order_id)
 
     def edit_order(self, order):
         """Редактирование заказа"""
-        dialog = OrderDialog(self.db, self, order)
+        dialog = self.order_dialog(order)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_orders()  # Обновляем список
+            self.order_saved(dialog.saved_order_id)
 
     def delete_order(self, order):
         """Удаление заказа"""
@@ -253,22 +366,23 @@ class OrdersWindow(QMainWindow):
 
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                # Удаляем связанные записи в order_items
-                delete_items_query = "DELETE FROM order_items WHERE order_id = %s"
-                self.db.execute_query(delete_items_query, (order.get('id'),))
-
-                # Удаляем заказ
-                delete_query = "DELETE FROM orders WHERE id = %s"
-                self.db.execute_query(delete_query, (order.get('id'),))
+                # Позиции заказа и сам заказ удаляются одной транзакцией
+                with self.db.transaction() as transaction:
+                    transaction.execute_named('delete_order_items', (order.get('id'),))
+                    transaction.execute_named('delete_order', (order.get('id'),))
+                self.sync.skip(order.get('id'))
 
                 QMessageBox.information(self, "Успех", "Заказ успешно удален!")
-                self.load_orders()
+                self.order_removed(order.get('id'))
 
             except Exception as e:
                 QMessageBox.critical(self, "Ошибка", f"Ошибка при удалении заказа: {str(e)}")
 
     def back_to_products(self):
         """Возврат к окну товаров"""
+        if self.session:
+            self.session.show_products()
+            return
         from products_window import ProductsWindow
         self.products_window = ProductsWindow(self.role, self.user_id, self.user_name, self.db)
         self.products_window.show()
@@ -276,15 +390,32 @@ class OrdersWindow(QMainWindow):
 
 
 class OrderDialog(QDialog):
+    saved = pyqtSignal(int)  # id заказа сразу после записи в БД
+
     def __init__(self, db, parent=None, order=None):
         super().__init__(parent)
         self.db = db
+        self.setModal(True)
+        self.setup_ui()
+        self.set_order(order)
+
+    def set_order(self, order=None):
+        """Подготовка формы к добавлению (None) или редактированию заказа
+
+        Окно заказов переиспользует один диалог: виджеты создаются один раз,
+        здесь только сбрасываются значения.
+        """
         self.order = order
         self.is_editing = order is not None
+        self.saved_order_id = None  # id сохранённого заказа после accept()
 
         self.setWindowTitle("Редактирование заказа" if self.is_editing else "Добавление заказа")
-        self.setModal(True)
-        self.setup_ui()
+        # Артикул заказа показывается только при редактировании, новый генерируется автоматически
+        self.form_layout.setRowVisible(self.receipt_code_input, self.is_editing)
+        # Справочники обновляются из кэша (без изменений модели не сбрасываются)
+        for combo in (self.pickup_combo, self.client_combo):
+            combo.model().refresh(self.db)
+        self.clear_form()
 
         if self.is_editing:
             self.load_order_data()
@@ -293,30 +424,26 @@ class OrderDialog(QDialog):
         layout = QVBoxLayout()
 
         # Форма
-        form_layout = QFormLayout()
+        form_layout = self.form_layout = QFormLayout()
 
         # Артикул заказа (только для редактирования)
-        if self.is_editing:
-            self.receipt_code_input = QLineEdit()
-            self.receipt_code_input.setReadOnly(True)
-            form_layout.addRow("Артикул заказа:", self.receipt_code_input)
-        else:
-            # Для нового заказа генерируем артикул автоматически
-            self.receipt_code_input = None
+        self.receipt_code_input = QLineEdit()
+        self.receipt_code_input.setReadOnly(True)
+        form_layout.addRow("Артикул заказа:", self.receipt_code_input)
 
         # Статус заказа
         self.status_combo = QComboBox()
         self.status_combo.addItems(["Новый", "Завершен"])
         form_layout.addRow("Статус заказа:", self.status_combo)
 
-        # Пункт выдачи
+        # Пункт выдачи (модели справочников общие для всех форм)
         self.pickup_combo = QComboBox()
-        self.load_pickup_points()
+        self.pickup_combo.setModel(reference_model(self.db, 'pickup_points'))
         form_layout.addRow("Пункт выдачи:", self.pickup_combo)
 
         # Клиент
         self.client_combo = QComboBox()
-        self.load_clients()
+        self.client_combo.setModel(reference_model(self.db, 'clients'))
         form_layout.addRow("Клиент:", self.client_combo)
 
         # Дата заказа
@@ -344,28 +471,14 @@ class OrderDialog(QDialog):
 
         self.setLayout(layout)
 
-    def load_pickup_points(self):
-        """Загрузка пунктов выдачи"""
-        points = self.db.execute_query("""
-                                       SELECT id, CONCAT(city, ', ', street, ', д. ', num_house) as address
-                                       FROM take_points
-                                       """)
-        self.pickup_combo.clear()
-        if points:
-            for point in points:
-                self.pickup_combo.addItem(point['address'], point['id'])
-
-    def load_clients(self):
-        """Загрузка клиентов"""
-        clients = self.db.execute_query("""
-                                        SELECT id, CONCAT(u_name, ' ', surname) as full_name
-                                        FROM users
-                                        WHERE role_id = 3 -- Только клиенты
-                                        """)
-        self.client_combo.clear()
-        if clients:
-            for client in clients:
-                self.client_combo.addItem(client['full_name'], client['id'])
+    def clear_form(self):
+        """Пустая форма нового заказа"""
+        self.receipt_code_input.clear()
+        self.status_combo.setCurrentIndex(0)
+        for combo in (self.pickup_combo, self.client_combo):
+            combo.setCurrentIndex(0 if combo.count() else -1)
+        self.order_date_input.setDate(QDate.currentDate())
+        self.delivery_date_input.setDate(QDate.currentDate().addDays(7))
 
     def load_order_data(self):
         """Загрузка данных заказа для редактирования"""
@@ -373,8 +486,7 @@ class OrderDialog(QDialog):
             return
 
         # Устанавливаем значения
-        if self.receipt_code_input:
-            self.receipt_code_input.setText(str(self.order.get('receipt_code', '')))
+        self.receipt_code_input.setText(str(self.order.get('receipt_code', '')))
 
         # Статус
         status = self.order.get('order_status')
@@ -386,18 +498,15 @@ class OrderDialog(QDialog):
         # Даты
         order_date = self.order.get('order_date')
         if order_date:
-            self.order_date_input.setDate(QDate.fromString(order_date, Qt.DateFormat.ISODate))
+            self.order_date_input.setDate(to_qdate(order_date))
 
         delivery_date = self.order.get('delivery_date')
         if delivery_date:
-            self.delivery_date_input.setDate(QDate.fromString(delivery_date, Qt.DateFormat.ISODate))
+            self.delivery_date_input.setDate(to_qdate(delivery_date))
 
-        # Клиент
-        client_name = self.order.get('client_name')
-        if client_name:
-            index = self.client_combo.findText(client_name)
-            if index >= 0:
-                self.client_combo.setCurrentIndex(index)
+        # Пункт выдачи и клиент
+        self.pickup_combo.model().select_in(self.pickup_combo, self.order.get('pickup_point_id'))
+        self.client_combo.model().select_in(self.client_combo, self.order.get('client_id'))
 
     def accept(self):
         """Сохранение заказа"""
@@ -429,31 +538,23 @@ class OrderDialog(QDialog):
                     self.delivery_date_input.date().toString(Qt.DateFormat.ISODate),
                     self.order.get('id')
                 )
+                result = self.db.execute_query(query, params)
             else:
-                # Добавление нового заказа
-                # Генерируем артикул заказа
-                last_order = self.db.execute_query("SELECT receipt_code FROM orders ORDER BY id DESC LIMIT 1")
-                if last_order and last_order[0]['receipt_code']:
-                    new_receipt_code = int(last_order[0]['receipt_code']) + 1
-                else:
-                    new_receipt_code = 1000
-
-                query = """
-                        INSERT INTO orders
-                        (order_status, pickup_point_id, client_id, order_date, delivery_date, receipt_code)
-                        VALUES (%s, %s, %s, %s, %s, %s) \
-                        """
-                params = (
+                # Добавление нового заказа одним запросом. Артикул выдаёт триггер
+                # из счётчика: одновременно создаваемые заказы ждут друг друга
+                # на строке счётчика и получают разные артикулы
+                result = self.db.execute_named('insert_order', (
                     self.status_combo.currentText(),
                     pickup_point_id,
                     client_id,
                     self.order_date_input.date().toString(Qt.DateFormat.ISODate),
-                    self.delivery_date_input.date().toString(Qt.DateFormat.ISODate),
-                    new_receipt_code
-                )
+                    self.delivery_date_input.date().toString(Qt.DateFormat.ISODate)
+                ))
 
-            result = self.db.execute_query(query, params)
             if result is not None:
+                # Для INSERT execute_query возвращает id новой строки
+                self.saved_order_id = self.order.get('id') if self.is_editing else result
+                self.saved.emit(self.saved_order_id)
                 QMessageBox.information(self, "Успех",
                                         "Заказ успешно обновлен!" if self.is_editing else "Заказ успешно добавлен!")
                 super().accept()
@@ -0,0 +1,218 @@
+from operator import attrgetter
+
+try:
+    import numpy as np
+except ImportError:  # без NumPy окно товаров фильтрует списками Python
+    np = None
+
+from product_queries import SORT_OPTIONS
+
+
+class ProductColumns:
+    """Колоночное хранилище загруженного каталога для фильтрации и сортировки
+
+    Числовые поля и коды поставщика/категории хранятся в массивах NumPy, фильтры
+    собираются в булеву маску, а порядок для каждого варианта сортировки
+    вычисляется при построении (устойчивый argsort) и затем переиспользуется.
+    Хранилище строится по готовому списку ProductRecord; изменения отдельных
+    товаров (update/append/delete) вносятся в массивы и перестановки точечно.
+    """
+
+    SEARCH_FIELDS = ('p_name', 'article', 'description', 'b_name')
+    _search_values = attrgetter(*SEARCH_FIELDS)
+    # Массивы по строкам в порядке значений _numbers() и кодов
+    COLUMNS = ('price', 'quantity', 'discount_percent', 'supplier_codes', 'category_codes')
+    # Предел памяти для колонки поиска со строками фиксированной ширины: ширина
+    # берётся по самому длинному тексту, и одно длинное описание раздувает всю колонку
+    FIXED_WIDTH_LIMIT = 32 * 1024 * 1024
+
+    def __init__(self, products):
+        self.products = products
+        count = len(products)
+
+        self.price = np.fromiter((float(p.price or 0) for p in products), np.float64, count)
+        self.quantity = np.fromiter((p.quantity or 0 for p in products), np.int64, count)
+        self.discount_percent = np.fromiter((p.discount_percent or 0 for p in products), np.int64, count)
+        self.supplier_codes, self.suppliers = self._encode(products, 's_name')
+        self.category_codes, self.categories = self._encode(products, 'category_name')
+        self.search_text = None  # колонка поиска подстроки, строится при первом поиске
+
+        self._positions = None  # артикул -> позиция, строится при обращении
+        self._orders = {}  # вариант сортировки -> перестановка строк
+        for sort_option in SORT_OPTIONS:
+            self.order(sort_option)
+
+    @classmethod
+    def build(cls, products):
+        """Хранилище для списка товаров или None, если NumPy не установлен"""
+        if np is None:
+            return None
+        return cls(products)
+
+    @staticmethod
+    def _encode(products, field):
+        """Коды значений поля (названия из справочника) и словарь название -> код"""
+        codes = {}
+        value = attrgetter(field)
+        column = np.fromiter((codes.setdefault(value(p), len(codes)) for p in products),
+                             np.int32, len(products))
+        return column, codes
+
+    @staticmethod
+    def _numbers(product):
+        return float(product.price or 0), product.quantity or 0, product.discount_percent or 0
+
+    @classmethod
+    def _search_text(cls, product):
+        """Текст полей поиска товара, заранее приведённый к нижнему регистру"""
+        return '\n'.join([str(value or '') for value in cls._search_values(product)]).lower()
+
+    def _search_column(self, products):
+        """Текст полей поиска каждого товара"""
+        texts = [self._search_text(p) for p in products]
+        width = max(map(len, texts), default=0) or 1
+        if width * 4 * len(texts) <= self.FIXED_WIDTH_LIMIT:
+            # Строки фиксированной ширины - поиск подстроки выполняется в C
+            return np.array(texts, dtype=f'<U{width}')
+        # Очень длинные описания: массив объектов, поиск перебором
+        return np.array(texts, dtype=object)
+
+    def search_mask(self, text):
+        """Маска товаров, содержащих подстроку"""
+        text = text.lower()
+        if self.search_text is None:
+            self.search_text = self._search_column(self.products)
+        if self.search_text.dtype == object:
+            return np.fromiter((text in value for value in self.search_text), bool, len(self.products))
+        return np.char.find(self.search_text, text) >= 0
+
+    def positions(self):
+        """Индекс артикул -> позиция товара"""
+        if self._positions is None:
+            self._positions = {p.article: i for i, p in enumerate(self.products)}
+        return self._positions
+
+    def scores_mask(self, scores):
+        """Маска товаров, найденных поиском (релевантность по артикулу)"""
+        mask = np.zeros(len(self.products), bool)
+        positions = self.positions()
+        mask[np.fromiter((positions[article] for article in scores if article in positions), np.intp)] = True
+        return mask
+
+    @staticmethod
+    def _code_mask(column, codes, name):
+        code = codes.get(name)
+        if code is None:
+            return np.zeros(len(column), bool)
+        return column == code
+
+    def order(self, sort_option):
+        """Перестановка всех строк для варианта сортировки"""
+        order = self._orders.get(sort_option)
+        if order is None:
+            order = self._orders[sort_option] = np.argsort(self._sort_values(sort_option), kind='stable')
+        return order
+
+    def _sort_values(self, sort_option):
+        _, key, direction = SORT_OPTIONS[sort_option]
+        values = getattr(self, key)
+        return -values if direction == 'DESC' else values
+
+    def _place(self, sort_option, order, i):
+        """Перестановка с добавленной строкой i на том месте, которое дал бы устойчивый argsort
+
+        Устойчивый порядок - это порядок по паре (значение, позиция): строка
+        ставится после равных значений с меньшими позициями.
+        """
+        values = self._sort_values(sort_option)
+        keys = values[order]
+        low = np.searchsorted(keys, values[i], 'left')
+        high = np.searchsorted(keys, values[i], 'right')
+        return np.insert(order, low + np.searchsorted(order[low:high], i), i)
+
+    def _fit_text(self, text):
+        """Расширение колонки поиска, если текст длиннее её строк фиксированной ширины"""
+        column = self.search_text
+        if column is None or column.dtype == object or len(text) <= column.dtype.itemsize // 4:
+            return
+        if len(text) * 4 * len(column) <= self.FIXED_WIDTH_LIMIT:
+            self.search_text = column.astype(f'<U{len(text)}')
+        else:
+            self.search_text = column.astype(object)
+
+    def update(self, i, product):
+        """Замена товара в позиции i"""
+        if self._positions is not None and self.products[i].article != product.article:
+            self._positions.pop(self.products[i].article, None)
+            self._positions[product.article] = i
+        self.products[i] = product
+        self.price[i], self.quantity[i], self.discount_percent[i] = self._numbers(product)
+        self.supplier_codes[i] = self.suppliers.setdefault(product.s_name, len(self.suppliers))
+        self.category_codes[i] = self.categories.setdefault(product.category_name, len(self.categories))
+        if self.search_text is not None:
+            text = self._search_text(product)
+            self._fit_text(text)
+            self.search_text[i] = text
+        for sort_option, order in self._orders.items():
+            self._orders[sort_option] = self._place(sort_option, order[order != i], i)
+
+    def append(self, product):
+        """Добавление товара в конец (в ту же позицию, что и в кэше окна)"""
+        i = len(self.products)
+        self.products.append(product)
+        if self._positions is not None:
+            self._positions[product.article] = i
+        values = self._numbers(product) + (
+            self.suppliers.setdefault(product.s_name, len(self.suppliers)),
+            self.categories.setdefault(product.category_name, len(self.categories)))
+        for name, value in zip(self.COLUMNS, values):
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate((column, np.array([value], column.dtype))))
+        if self.search_text is not None:
+            text = self._search_text(product)
+            self._fit_text(text)
+            self.search_text = np.append(self.search_text, np.array([text], self.search_text.dtype))
+        for sort_option, order in self._orders.items():
+            self._orders[sort_option] = self._place(sort_option, order, i)
+
+    def delete(self, i):
+        """Удаление товара в позиции i; позиции следующих уменьшаются на 1"""
+        del self.products[i]
+        self._positions = None
+        for name in self.COLUMNS:
+            setattr(self, name, np.delete(getattr(self, name), i))
+        if self.search_text is not None:
+            self.search_text = np.delete(self.search_text, i)
+        for sort_option, order in self._orders.items():
+            order = order[order != i]
+            order[order > i] -= 1
+            self._orders[sort_option] = order
+
+    def filter(self, search_text='', scores=None, supplier=None, category=None, sort_option=None):
+        """Позиции товаров, прошедших фильтры, в нужном порядке (массив индексов)
+
+        scores - релевантность найденных поиском товаров по артикулу, без неё
+        search_text ищется как подстрока. supplier/category - названия (None - все).
+        Без сортировки найденные поиском товары упорядочены по релевантности.
+        """
+        mask = np.ones(len(self.products), bool)
+        if scores is not None:
+            mask &= self.scores_mask(scores)
+        elif search_text:
+            mask &= self.search_mask(search_text)
+        if supplier is not None:
+            mask &= self._code_mask(self.supplier_codes, self.suppliers, supplier)
+        if category is not None:
+            mask &= self._code_mask(self.category_codes, self.categories, category)
+
+        if sort_option in SORT_OPTIONS:
+            order = self.order(sort_option)
+            selected = order[mask[order]]
+        else:
+            selected = np.flatnonzero(mask)
+            if scores is not None:
+                products = self.products
+                relevance = np.fromiter((float(scores[products[i].article]) for i in selected),
+                                        np.float64, len(selected))
+                selected = selected[np.argsort(-relevance, kind='stable')]
+        return selected
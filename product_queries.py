@@ -0,0 +1,212 @@
+from database import statements
+from row_store import ProductRecord
+
+
+# Колонки и соединения запроса товаров со всеми справочниками
+PRODUCTS_COLUMNS = """
+                  SELECT p.article, \
+                         p.p_name, \
+                         c.category_name, \
+                         b.b_name, \
+                         s.s_name, \
+                         p.price, \
+                         p.quantity, \
+                         p.discount_percent, \
+                         p.description, \
+                         p.image_path, \
+                         p.id, \
+                         p.category_id, \
+                         p.brend_id, \
+                         p.supplier_id"""
+PRODUCTS_FROM = """
+                  FROM products p
+                           LEFT JOIN categories c ON p.category_id = c.id
+                           LEFT JOIN brends b ON p.brend_id = b.id
+                           LEFT JOIN suppliers s ON p.supplier_id = s.id \
+                  """
+PRODUCTS_SELECT = PRODUCTS_COLUMNS + PRODUCTS_FROM
+
+statements.register('load_products', PRODUCTS_SELECT)
+# Один товар по артикулу (уникальный индекс) для точечного обновления кэша
+statements.register('load_product', PRODUCTS_SELECT + " WHERE p.article = %s")
+
+# Сортировка: колонка, ключ в строке результата и направление
+SORT_OPTIONS = {
+    "Количество ↑": ('p.quantity', 'quantity', 'ASC'),
+    "Количество ↓": ('p.quantity', 'quantity', 'DESC'),
+    "Цена ↑": ('p.price', 'price', 'ASC'),
+    "Цена ↓": ('p.price', 'price', 'DESC'),
+    "Скидка ↑": ('p.discount_percent', 'discount_percent', 'ASC'),
+    "Скидка ↓": ('p.discount_percent', 'discount_percent', 'DESC'),
+}
+
+
+def like_pattern(text):
+    """Шаблон LIKE для поиска подстроки с экранированием спецсимволов"""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+class ProductQuery:
+    """Построитель параметризованного запроса товаров из фильтров окна"""
+
+    def __init__(self, search_text='', supplier_id=None, category_id=None, sort_option="Без сортировки",
+                 search=None):
+        self.search_text = search_text.strip()
+        self.supplier_id = supplier_id
+        self.category_id = category_id
+        self.sort_option = sort_option
+        self.search = search  # SearchBackend из product_search или None
+
+    def search_condition(self):
+        """Условие поиска: полнотекстовое, если поиск его поддерживает, иначе LIKE"""
+        if not self.search_text:
+            return None
+
+        condition = self.search.sql_condition(self.search_text) if self.search else None
+        if condition:
+            return condition
+
+        pattern = like_pattern(self.search_text)
+        return ("(p.p_name LIKE %s OR p.article LIKE %s "
+                "OR p.description LIKE %s OR b.b_name LIKE %s)", [pattern] * 4)
+
+    def sort_spec(self):
+        """Выражение сортировки, ключ в строке, направление и параметры выражения
+
+        Без явной сортировки результаты поиска упорядочиваются по релевантности.
+        """
+        sort = SORT_OPTIONS.get(self.sort_option)
+        if sort:
+            return sort + ([],)
+
+        if self.search_text and self.search:
+            relevance = self.search.relevance_sql(self.search_text)
+            if relevance:
+                return relevance[0], 'relevance', 'DESC', list(relevance[1])
+
+        return None
+
+    def where(self):
+        """Условия WHERE и их параметры"""
+        conditions = []
+        params = []
+
+        search = self.search_condition()
+        if search:
+            conditions.append(search[0])
+            params.extend(search[1])
+
+        if self.supplier_id is not None:
+            conditions.append("p.supplier_id = %s")
+            params.append(self.supplier_id)
+
+        if self.category_id is not None:
+            conditions.append("p.category_id = %s")
+            params.append(self.category_id)
+
+        return conditions, params
+
+    def sort_key(self, product):
+        """Ключ строки для продолжения выборки со следующей страницы"""
+        sort = self.sort_spec()
+        if sort:
+            return product[sort[1]], product['id']
+        return product['id'],
+
+    def select(self, after=None, limit=None, article=None):
+        """Запрос страницы товаров, следующей за ключом after
+
+        article - только этот товар, если он подходит под фильтры.
+        """
+        sort = self.sort_spec()
+        conditions, params = self.where()
+        if article is not None:
+            conditions.append("p.article = %s")
+            params.append(article)
+
+        query = PRODUCTS_COLUMNS
+        if sort and sort[1] == 'relevance':
+            query += f", {sort[0]} AS relevance"
+            params = sort[3] + params
+        query += PRODUCTS_FROM
+
+        if after is not None:
+            if sort:
+                column, _, direction, column_params = sort
+                op = '>' if direction == 'ASC' else '<'
+                conditions.append(f"({column} {op} %s OR ({column} = %s AND p.id {op} %s))")
+                params.extend(column_params + [after[0]] + column_params + [after[0], after[1]])
+            else:
+                conditions.append("p.id > %s")
+                params.append(after[0])
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        if sort:
+            column, key, direction, _ = sort
+            order = key if key == 'relevance' else column
+            query += f" ORDER BY {order} {direction}, p.id {direction}"
+        else:
+            query += " ORDER BY p.id"
+
+        if limit:
+            query += " LIMIT %s"
+            params.append(limit)
+
+        return query, tuple(params)
+
+    def count(self):
+        """Запрос количества товаров, подходящих под фильтры"""
+        conditions, params = self.where()
+        query = "SELECT COUNT(*) AS count FROM products p"
+        if self.search_condition():
+            # Любой поиск (LIKE и полнотекстовый) проверяет и производителя b.b_name
+            query += " LEFT JOIN brends b ON p.brend_id = b.id"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return query, tuple(params)
+
+
+class ProductPager:
+    """Постраничная загрузка товаров по ключу сортировки и p.id (keyset pagination)"""
+
+    def __init__(self, db, page_size=200, query=None):
+        self.db = db
+        self.page_size = page_size
+        self.query = query or ProductQuery()
+        self.reset()
+
+    def reset(self):
+        """Начать выборку с первой страницы"""
+        self.last_key = None
+        self.exhausted = False
+        self.total = None
+
+    def count(self):
+        """Количество товаров, подходящих под текущие фильтры"""
+        if self.total is None:
+            result = self.db.execute_query(*self.query.count())
+            if result:
+                self.total = result[0]['count']
+        return self.total
+
+    def has_more(self):
+        """Есть ли ещё не загруженные страницы"""
+        return not self.exhausted
+
+    def next_page(self):
+        """Следующая страница товаров или None при ошибке"""
+        if self.exhausted:
+            return []
+
+        products = self.db.execute_query(*self.query.select(self.last_key, self.page_size))
+        if products is None:
+            return None
+
+        if len(products) < self.page_size:
+            self.exhausted = True
+        if products:
+            self.last_key = self.query.sort_key(products[-1])
+        return [ProductRecord.from_row(product) for product in products]
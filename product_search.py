@@ -0,0 +1,206 @@
+from bisect import bisect_left, insort
+from product_queries import like_pattern
+import re
+
+
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Разбиение текста на слова в нижнем регистре"""
+    return WORD_RE.findall(str(text or '').lower())
+
+
+def substring_filter(products, text):
+    """Поиск подстроки перебором: запасной путь для коротких запросов"""
+    text = text.lower()
+    return [
+        p for p in products
+        if (text in str(p.get('p_name', '')).lower() or
+            text in str(p.get('article', '')).lower() or
+            text in str(p.get('description', '')).lower() or
+            text in str(p.get('b_name', '')).lower())
+    ]
+
+
+class SearchBackend:
+    """Общий API поиска товаров, который вызывает ProductsWindow
+
+    rank() возвращает релевантность найденных товаров по артикулу (None - запрос
+    не подходит для поиска по словам, пустой словарь - слова не нашлись; в обоих
+    случаях ищется подстрока), filter() ищет среди
+    загруженных товаров, sql_condition()/relevance_sql() дают условие для запроса
+    в БД (None - искать через LIKE).
+    """
+
+    def sql_condition(self, text):
+        return None
+
+    def relevance_sql(self, text):
+        return None
+
+    def rank(self, text):
+        return None
+
+    def filter(self, products, text):
+        """Найденные товары в порядке убывания релевантности"""
+        scores = self.rank(text)
+        if not scores:
+            # Слова не нашлись по префиксу - ищем подстроку («ссовки», «001»)
+            return substring_filter(products, text)
+
+        found = [p for p in products if p.get('article') in scores]
+        found.sort(key=lambda p: scores[p.get('article')], reverse=True)
+        return found
+
+    def index_products(self, products):
+        """Полная (пере)индексация загруженных товаров"""
+
+    def product_saved(self, product):
+        """Товар добавлен или изменён"""
+
+    def product_removed(self, article):
+        """Товар удалён"""
+
+
+class FulltextSearch(SearchBackend):
+    """Поиск через индекс MySQL FULLTEXT (MATCH ... AGAINST в режиме BOOLEAN)
+
+    Производитель хранится в другой таблице и в полнотекстовый индекс не входит,
+    поэтому он ищется отдельным условием LIKE (запрос соединяется с brends).
+    Индекс ищет слова по префиксу, а артикул - ещё и по подстроке («001» -> ART001).
+    """
+
+    MATCH = "MATCH(p.p_name, p.description, p.article) AGAINST(%s IN BOOLEAN MODE)"
+    CONDITION = f"({MATCH} OR p.article LIKE %s OR b.b_name LIKE %s)"
+    # Слова короче innodb_ft_min_token_size не попадают в индекс
+    MIN_TOKEN_SIZE = 3
+
+    def __init__(self, db):
+        self.db = db
+
+    def boolean_query(self, text):
+        """Все слова обязательны, каждое ищется по префиксу: «кросс найк» -> «+кросс* +найк*»"""
+        tokens = tokenize(text)
+        if not tokens or any(len(token) < self.MIN_TOKEN_SIZE for token in tokens):
+            return None
+        return ' '.join(f"+{token}*" for token in tokens)
+
+    def sql_condition(self, text):
+        query = self.boolean_query(text)
+        if query is None:
+            return None
+        pattern = like_pattern(text.strip())
+        return self.CONDITION, [query, pattern, pattern]
+
+    def relevance_sql(self, text):
+        query = self.boolean_query(text)
+        if query is None:
+            return None
+        return self.MATCH, [query]
+
+    def rank(self, text):
+        query = self.boolean_query(text)
+        if query is None:
+            return None
+
+        pattern = like_pattern(text.strip())
+        rows = self.db.execute_query(
+            f"SELECT p.article, {self.MATCH} AS relevance FROM products p "
+            f"LEFT JOIN brends b ON p.brend_id = b.id WHERE {self.CONDITION}",
+            (query, query, pattern, pattern)
+        )
+        if rows is None:
+            return None
+        return {row['article']: row['relevance'] for row in rows}
+
+
+class InvertedIndex(SearchBackend):
+    """Инвертированный индекс загруженных товаров в памяти
+
+    Слова запроса ищутся по префиксу (через отсортированный словарь и bisect),
+    товар должен содержать все слова; релевантность - сумма весов полей.
+    """
+
+    FIELD_WEIGHTS = {
+        'p_name': 3,
+        'article': 3,
+        'b_name': 2,
+        'description': 1,
+    }
+
+    def __init__(self):
+        self._postings = {}  # слово -> {артикул: вес}
+        self._words = []  # отсортированный словарь для поиска по префиксу
+        self._documents = {}  # артикул -> слова товара
+
+    def index_products(self, products):
+        self._postings = {}
+        self._documents = {}
+        for product in products:
+            self._add(product)
+        self._words = sorted(self._postings)
+
+    def product_saved(self, product):
+        self.product_removed(product.get('article'))
+        for word in self._add(product):
+            if len(self._postings[word]) == 1:
+                insort(self._words, word)
+
+    def product_removed(self, article):
+        for word in self._documents.pop(article, ()):
+            postings = self._postings[word]
+            postings.pop(article, None)
+            if not postings:
+                del self._postings[word]
+                del self._words[bisect_left(self._words, word)]
+
+    def _add(self, product):
+        article = product.get('article')
+        weights = {}
+        for field, weight in self.FIELD_WEIGHTS.items():
+            for word in tokenize(product.get(field)):
+                weights[word] = weights.get(word, 0) + weight
+
+        for word, weight in weights.items():
+            self._postings.setdefault(word, {})[article] = weight
+        self._documents[article] = tuple(weights)
+        return weights
+
+    def rank(self, text):
+        if not tokenize(text):
+            return None
+        return self.search(text)
+
+    def search(self, text):
+        """Артикулы, подходящие под запрос, с релевантностью"""
+        scores = None
+        for token in tokenize(text):
+            token_scores = {}
+            position = bisect_left(self._words, token)
+            while position < len(self._words) and self._words[position].startswith(token):
+                word = self._words[position]
+                # Точное совпадение слова важнее совпадения по префиксу
+                factor = 2 if word == token else 1
+                for article, weight in self._postings[word].items():
+                    token_scores[article] = token_scores.get(article, 0) + weight * factor
+                position += 1
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {article: score + token_scores[article]
+                          for article, score in scores.items() if article in token_scores}
+            if not scores:
+                break
+
+        return scores or {}
+
+
+def create_search(kind, db):
+    """Поиск по виду: 'fulltext' - индекс MySQL, 'index' - индекс в памяти"""
+    if kind == 'fulltext':
+        return FulltextSearch(db)
+    if kind == 'index':
+        return InvertedIndex()
+    raise ValueError(f"Неизвестный вид поиска: {kind}")
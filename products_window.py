@@ -1,24 +1,58 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QLabel, QTableWidget, QTableWidgetItem,
-                             QHeaderView, QPushButton, QMessageBox,
+                             QLabel, QTableView, QHeaderView, QPushButton, QMessageBox,
                              QLineEdit, QComboBox, QDialog, QFormLayout,
                              QSpinBox, QDoubleSpinBox, QFileDialog, QTextEdit,
                              QDialogButtonBox, QCheckBox)
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QColor, QPixmap, QFont
-from PIL import Image
+from PyQt6.QtCore import Qt, QSize, pyqtSignal
+from PyQt6.QtGui import QPixmap, QFont
+from table_models import ProductsTableModel, ActionsDelegate
+from debounce import Debouncer
+from product_queries import ProductQuery, ProductPager, SORT_OPTIONS
+from product_search import create_search
+from product_columns import ProductColumns
+from change_feed import WindowSync, INSERT, DELETE
+from reference_data import reference_data
+from reference_models import reference_model
+from image_cache import image_cache, ViewportThumbnails, THUMBNAIL_SIZES
+from image_store import image_store
+from database import statements
+from background import BackgroundLoader, LoadingIndicator
+from row_store import ProductRecord, as_records
+from bisect import bisect_right
 import os
 
 
+statements.register('count_products', "SELECT COUNT(*) AS count FROM products")
+
+
 class ProductsWindow(QMainWindow):
-    def __init__(self, role, user_id, user_name, db):
+    # Размер страницы при постраничной загрузке; 0 - загружать весь каталог сразу
+    PAGE_SIZE = 200
+    # Пауза во вводе (мс), после которой применяются фильтры
+    FILTER_DELAY = Debouncer.DEFAULT_DELAY
+
+    def __init__(self, role, user_id, user_name, db, page_size=None, search_kind=None, session=None):
         super().__init__()
         self.role = role
         self.user_id = user_id
         self.user_name = user_name
         self.db = db
-        self.all_products = []
+        self.session = session  # SessionManager: переходы между окнами без их пересоздания
+        self.all_products = []  # кэш окна; индекс по артикулу хранит модель таблицы
+        self.product_columns = None  # колонки NumPy каталога в памяти
+        self.columns_generation = 0
         self.current_image_path = None
+        self.dialog = None  # переиспользуемый диалог товара
+        self.page_size = self.PAGE_SIZE if page_size is None else page_size
+        self.pager = ProductPager(self.db, self.page_size) if self.page_size else None
+        # Поиск в БД через FULLTEXT при постраничной загрузке, иначе по индексу в памяти
+        self.product_search = create_search(search_kind or ('fulltext' if self.pager else 'index'), self.db)
+        self.filter_debouncer = Debouncer(self.apply_filters, self.FILTER_DELAY, self)
+        # Запросы выполняются в фоне, окно показывается сразу
+        self.loader = BackgroundLoader(self)
+        self.filters_pending = False
+        # Изменения с других рабочих мест и изменения справочников
+        self.sync = WindowSync(self, 'products', self.apply_changes, self.on_reference_changes)
 
         self.setup_ui()
         self.load_products()
@@ -73,7 +107,9 @@ class ProductsWindow(QMainWindow):
             search_layout.addWidget(QLabel("Поиск:"))
             self.search_input = QLineEdit()
             self.search_input.setPlaceholderText("Поиск по названию, артикулу...")
-            self.search_input.textChanged.connect(self.apply_filters)
+            self.search_input.textChanged.connect(self.filter_debouncer.trigger)
+            self.search_input.returnPressed.connect(self.filter_debouncer.flush)
+            self.filter_debouncer.ran.connect(self.show_filter_stats)
             search_layout.addWidget(self.search_input)
             filters_layout.addLayout(search_layout)
 
@@ -83,13 +119,13 @@ class ProductsWindow(QMainWindow):
             # Фильтр по поставщику
             filter_layout.addWidget(QLabel("Поставщик:"))
             self.supplier_filter = QComboBox()
-            self.supplier_filter.currentTextChanged.connect(self.apply_filters)
+            self.supplier_filter.currentTextChanged.connect(self.filter_debouncer.trigger)
             filter_layout.addWidget(self.supplier_filter)
 
             # Фильтр по категории
             filter_layout.addWidget(QLabel("Категория:"))
             self.category_filter = QComboBox()
-            self.category_filter.currentTextChanged.connect(self.apply_filters)
+            self.category_filter.currentTextChanged.connect(self.filter_debouncer.trigger)
             filter_layout.addWidget(self.category_filter)
 
             # Сортировка
@@ -104,7 +140,7 @@ class ProductsWindow(QMainWindow):
                 "Скидка ↑",
                 "Скидка ↓"
             ])
-            self.sort_combo.currentTextChanged.connect(self.apply_filters)
+            self.sort_combo.currentTextChanged.connect(self.filter_debouncer.trigger)
             filter_layout.addWidget(self.sort_combo)
 
             filters_layout.addLayout(filter_layout)
@@ -116,214 +152,411 @@ class ProductsWindow(QMainWindow):
         layout.addWidget(title)
 
         # Таблица товаров
-        self.products_table = QTableWidget()
-        if self.role == "Администратор":
-            self.products_table.setColumnCount(10)
-            self.products_table.setHorizontalHeaderLabels([
-                "Артикул",
-                "Наименование",
-                "Категория",
-                "Производитель",
-                "Поставщик",
-                "Цена",
-                "Количество",
-                "Скидка %",
-                "Описание",
-                "Действия"
-            ])
-        else:
-            self.products_table.setColumnCount(8)
-            self.products_table.setHorizontalHeaderLabels([
-                "Артикул",
-                "Наименование",
-                "Категория",
-                "Производитель",
-                "Цена",
-                "Количество",
-                "Скидка %",
-                "Описание"
-            ])
+        self.products_model = ProductsTableModel(self.role, self)
+        self.products_table = QTableView()
+        self.products_table.setModel(self.products_model)
+
+        # Кнопки действий рисуются делегатом, а не виджетом в каждой строке
+        actions_col = self.products_model.actions_column()
+        if actions_col >= 0:
+            self.actions_delegate = ActionsDelegate(self.products_table)
+            self.actions_delegate.edit_clicked.connect(
+                lambda row: self.edit_product(self.products_model.product_at(row)))
+            self.actions_delegate.delete_clicked.connect(
+                lambda row: self.delete_product(self.products_model.product_at(row)))
+            self.products_table.setItemDelegateForColumn(actions_col, self.actions_delegate)
 
         self.products_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+
+        # Миниатюры загружаются в фоне и только для видимых строк
+        image_col = self.products_model.columns.index('image')
+        width, height = THUMBNAIL_SIZES['small']
+        self.products_table.setIconSize(QSize(width, height))
+        self.products_table.verticalHeader().setDefaultSectionSize(height + 4)
+        self.products_table.horizontalHeader().setSectionResizeMode(image_col, QHeaderView.ResizeMode.Fixed)
+        self.products_table.setColumnWidth(image_col, width + 8)
+        self.thumbnails = ViewportThumbnails(self.products_table, image_col)
         self.products_table.setAlternatingRowColors(True)
         self.products_table.doubleClicked.connect(self.on_table_double_click)
 
         layout.addWidget(self.products_table)
 
+        # Сколько товаров загружено из общего количества
+        self.count_label = QLabel()
+        layout.addWidget(self.count_label)
+        layout.addWidget(LoadingIndicator(self.loader))
+        self.products_model.rowsInserted.connect(self.update_count_label)
+        self.products_model.modelReset.connect(self.update_count_label)
+        self.products_model.paging_changed.connect(self.update_count_label)
+
         central_widget.setLayout(layout)
 
     def load_filters_data(self):
-        """Загрузка данных для фильтров"""
+        """Фоновая загрузка данных для фильтров (и справочника брендов для формы товара)"""
+        self.loader.run(
+            lambda: reference_data.prefetch(self.db, 'suppliers', 'categories', 'brands'),
+            self.fill_filters,
+            lambda message: print(f"❌ Ошибка загрузки фильтров: {message}")
+        )
+
+    def fill_filters(self, result):
+        """Заполнение фильтров поставщиков и категорий (выбранные значения сохраняются)"""
+        suppliers, categories, _ = result
+        selected = (self.supplier_filter.currentData(), self.category_filter.currentData())
         try:
-            # Загружаем поставщиков
-            suppliers = self.db.execute_query("SELECT s_name FROM suppliers")
+            # Пока комбобоксы заполняются, фильтрация не запускается
+            self.supplier_filter.blockSignals(True)
+            self.category_filter.blockSignals(True)
+
+            # Поставщики (id хранится в данных элемента для фильтра в SQL)
             self.supplier_filter.clear()
             self.supplier_filter.addItem("Все поставщики")
 
             if suppliers:
                 for supplier in suppliers:
                     if supplier and 's_name' in supplier and supplier['s_name']:
-                        self.supplier_filter.addItem(supplier['s_name'])
+                        self.supplier_filter.addItem(supplier['s_name'], supplier['id'])
 
-            # Загружаем категории
-            categories = self.db.execute_query("SELECT category_name FROM categories")
+            # Категории
             self.category_filter.clear()
             self.category_filter.addItem("Все категории")
 
             if categories:
                 for category in categories:
                     if category and 'category_name' in category and category['category_name']:
-                        self.category_filter.addItem(category['category_name'])
+                        self.category_filter.addItem(category['category_name'], category['id'])
 
         except Exception as e:
             print(f"❌ Ошибка загрузки фильтров: {e}")
 
-    def load_products(self):
-        """Загрузка всех товаров из базы данных"""
-        try:
-            query = """
-                    SELECT p.article, \
-                           p.p_name, \
-                           c.category_name, \
-                           b.b_name, \
-                           s.s_name, \
-                           p.price, \
-                           p.quantity, \
-                           p.discount_percent, \
-                           p.description, \
-                           p.image_path, \
-                           p.id
-                    FROM products p
-                             LEFT JOIN categories c ON p.category_id = c.id
-                             LEFT JOIN brends b ON p.brend_id = b.id
-                             LEFT JOIN suppliers s ON p.supplier_id = s.id \
-                    """
-
-            products = self.db.execute_query(query)
-
-            if products is None:
-                QMessageBox.warning(self, "Ошибка", "Не удалось загрузить товары")
-                return
+        finally:
+            self.supplier_filter.setCurrentIndex(max(self.supplier_filter.findData(selected[0]), 0))
+            self.category_filter.setCurrentIndex(max(self.category_filter.findData(selected[1]), 0))
+            self.supplier_filter.blockSignals(False)
+            self.category_filter.blockSignals(False)
+
+        if (self.supplier_filter.currentData(), self.category_filter.currentData()) != selected:
+            # Выбранный поставщик или категория удалены
+            self.filter_debouncer.trigger()
 
-            self.all_products = products
+    def load_products(self, query=None):
+        """Фоновая загрузка товаров (первой страницы или всего каталога частями)
+
+        query - новые фильтры для постраничного режима, по умолчанию текущие.
+        """
+        try:
+            self.all_products = []
+            self.sync.reset()
+            self.product_columns = None
+            self.columns_generation += 1
             self.display_products(self.all_products)
 
+            if self.pager:
+                # Новый pager на каждую загрузку: прерванная задача не испортит ключ следующей
+                pager = ProductPager(self.db, self.page_size, query or self.pager.query)
+                self.pager = pager
+                self.loader.load(pager.next_page, self.on_products_chunk, self.on_products_loaded,
+                                 self.on_products_failed,
+                                 on_cancel=lambda: self.on_products_loaded(complete=False))
+                # COUNT(*) по фильтрам - отдельной задачей: первая страница его не ждёт
+                self.loader.run(pager.count, lambda total: self.on_products_counted(pager))
+            else:
+                # Каталог читается потоково и показывается по мере получения строк
+                self.loader.load(lambda: as_records(self.db.stream_named('load_products'), ProductRecord),
+                                 self.on_products_chunk, self.on_products_loaded, self.on_products_failed,
+                                 count=self.count_products,
+                                 on_cancel=lambda: self.on_products_loaded(complete=False))
+
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Ошибка загрузки товаров: {str(e)}")
             print(f"❌ Ошибка в load_products: {e}")
 
-    def display_products(self, products):
-        """Отображение товаров в таблице"""
-        try:
-            self.products_table.setRowCount(len(products))
-
-            for row, product in enumerate(products):
-                # Безопасно получаем значения
-                article = str(product.get('article', ''))
-                p_name = str(product.get('p_name', ''))
-                category_name = str(product.get('category_name', ''))
-                b_name = str(product.get('b_name', ''))
-                s_name = str(product.get('s_name', ''))
-                price = float(product.get('price', 0))
-                quantity = int(product.get('quantity', 0))
-                discount = int(product.get('discount_percent', 0))
-                description = str(product.get('description', ''))
-                product_id = product.get('id')
-
-                # Артикул
-                self.products_table.setItem(row, 0, QTableWidgetItem(article))
-
-                # Наименование
-                self.products_table.setItem(row, 1, QTableWidgetItem(p_name))
-
-                # Категория
-                self.products_table.setItem(row, 2, QTableWidgetItem(category_name))
-
-                # Производитель
-                self.products_table.setItem(row, 3, QTableWidgetItem(b_name))
-
-                # Для администратора добавляем поставщика
-                if self.role == "Администратор":
-                    self.products_table.setItem(row, 4, QTableWidgetItem(s_name))
-                    col_offset = 1
-                else:
-                    col_offset = 0
-
-                # Цена
-                price_col = 4 + col_offset
-                if discount > 0:
-                    final_price = price * (1 - discount / 100)
-                    price_text = f"~~{price:.2f}~~ → {final_price:.2f} ₽"
-                    price_item = QTableWidgetItem(price_text)
-                    price_item.setForeground(QColor('red'))
-                else:
-                    price_item = QTableWidgetItem(f"{price:.2f} ₽")
+    def count_products(self):
+        """Количество товаров в каталоге (выполняется в фоне)"""
+        result = self.db.execute_named('count_products')
+        return result[0]['count'] if result else None
+
+    def on_products_counted(self, pager):
+        """Количество товаров по фильтрам посчитано (если загрузка с тех пор не сменилась)"""
+        if pager is self.pager:
+            self.update_count_label()
+
+    def on_products_chunk(self, products):
+        """Очередная часть загруженных товаров сразу появляется в таблице"""
+        self.products_model.append_products(products)
+
+    def on_products_loaded(self, complete=True):
+        """Загрузка завершена: применяем изменения, пришедшие во время загрузки
+
+        complete=False - загрузка отменена, рабочим кэшем становится уже
+        загруженная часть каталога (поиск, колонки и фильтры строятся по ней).
+        """
+        if self.pager:
+            if complete:
+                # Дальнейшие страницы догружаются при прокрутке; после отмены
+                # ключ прерванной страницы неизвестен, и догрузка не подключается
+                self.products_model.set_pager(self.pager)
+        else:
+            self.product_search.index_products(self.all_products)
+
+        # Без pager здесь же строятся колонки NumPy
+        self.sync.flush()
+
+        if not self.pager and self.filters_pending:
+            self.filters_pending = False
+            self.apply_filters()
+
+    def rebuild_columns(self):
+        """Колонки строятся в фоне по копии кэша, до их готовности фильтрует Python"""
+        self.product_columns = None
+        self.columns_generation += 1
+        generation = self.columns_generation
+        products = list(self.all_products)
+        self.loader.run(lambda: ProductColumns.build(products),
+                        lambda columns: self.on_columns_built(columns, generation))
+
+    def on_columns_built(self, columns, generation):
+        """Колонки NumPy готовы (если кэш с тех пор не менялся)"""
+        if generation == self.columns_generation:
+            self.product_columns = columns
+
+    def product_saved(self, article, insert=True, refresh=True):
+        """Точечное обновление кэша после добавления или изменения товара
+
+        Загружается одна строка по артикулу, в таблице меняется или
+        добавляется только она; готовые колонки NumPy правятся в той же позиции.
+        insert=False - товар, которого нет в кэше (ещё не загруженная страница),
+        не добавляется; refresh=False - колонки, которые ещё не построены,
+        перестраивает вызывающий код после пакета изменений.
+        """
+        if self.loader.is_loading():
+            # Товар может прийти и в ещё не загруженной части - перезапускаем загрузку
+            self.load_products()
+            return
 
-                self.products_table.setItem(row, price_col, price_item)
+        cached = self.products_model.position_of(article) is not None
+        if not cached and not insert:
+            return
 
-                # Количество
-                quantity_col = 5 + col_offset
-                quantity_item = QTableWidgetItem(str(quantity))
-                self.products_table.setItem(row, quantity_col, quantity_item)
+        if self.pager:
+            # Товар читается запросом текущих фильтров: пустой результат - товар
+            # удалён или больше не подходит под них
+            rows = self.db.execute_query(*self.pager.query.select(article=article))
+        else:
+            rows = self.db.execute_named('load_product', (article,))
+        if rows is None:
+            # Не удалось получить товар - перечитываем каталог целиком
+            self.load_products()
+            return
+        if not rows:
+            self.product_removed(article, refresh)
+            return
 
-                # Скидка
-                discount_col = 6 + col_offset
-                discount_item = QTableWidgetItem(str(discount))
-                self.products_table.setItem(row, discount_col, discount_item)
+        product = ProductRecord.from_row(rows[0])
 
-                # Описание
-                desc_col = 7 + col_offset
-                desc_item = QTableWidgetItem(description[:100] + "..." if len(description) > 100 else description)
-                self.products_table.setItem(row, desc_col, desc_item)
+        # Кэш окна - список модели, она же обновляет свой индекс по артикулу
+        if cached:
+            self.products_model.update_product(product)
+        else:
+            self.products_model.insert_product(product, None)
+            if self.pager and self.pager.total is not None:
+                self.pager.total += 1
+
+        if not self.pager:
+            self.product_search.product_saved(product)
+        self.place_product(product)
+
+        if not self.pager:
+            if self.product_columns is not None:
+                # Колонки повторяют кэш: новый товар тоже добавляется в конец
+                if cached:
+                    self.product_columns.update(self.products_model.position_of(article), product)
+                else:
+                    self.product_columns.append(product)
+            elif refresh:
+                self.rebuild_columns()
+        self.update_count_label()
+
+    def place_product(self, product):
+        """Показ сохранённого товара по текущим фильтрам и сортировке
+
+        Неподходящий под фильтры товар скрывается (в постраничном режиме их
+        уже проверил запрос). Подходящий ставится на место по сортировке; без
+        неё новый товар показывается первым, изменённый остаётся на своей строке.
+        """
+        model = self.products_model
+        article = product.get('article')
+        if not self.pager and not self.product_matches(product):
+            model.hide_product(article)
+            return
+
+        key = self.row_sort_key()
+        row = model.row_of(article)
+        if key is None:
+            if row is None:
+                model.show_product(article, 0)
+            return
 
-                # Действия для администратора
-                if self.role == "Администратор":
-                    actions_col = 9
-                    actions_widget = QWidget()
-                    actions_layout = QHBoxLayout()
-                    actions_layout.setContentsMargins(0, 0, 0, 0)
+        def row_key(r):
+            return key(model.product_at(r))
+
+        if row is not None:
+            if ((row == 0 or row_key(row - 1) <= key(product)) and
+                    (row == model.rowCount() - 1 or key(product) <= row_key(row + 1))):
+                return  # порядок не нарушен
+            model.hide_product(article)
+
+        row = bisect_right(range(model.rowCount()), key(product), key=row_key)
+        if self.pager and row == model.rowCount() and model.canFetchMore():
+            # Место товара - на ещё не загруженной странице, он придёт вместе с ней
+            model.remove_product(article)
+            return
+        model.show_product(article, row)
+
+    def row_sort_key(self):
+        """Ключ по возрастанию для порядка показанных строк или None (порядок не задан)"""
+        if self.pager:
+            sort = self.pager.query.sort_spec()
+            if sort is None:
+                return None
+            _, field, direction, _ = sort
+            sign = -1 if direction == 'DESC' else 1
+            # Как в ORDER BY запроса: значение, затем p.id в том же направлении
+            return lambda p: (sign * (p.get(field) or 0), sign * (p.get('id') or 0))
+
+        sort = SORT_OPTIONS.get(self.filter_state()[3])
+        if sort is None:
+            return None
+        _, field, direction = sort
+        sign = -1 if direction == 'DESC' else 1
+        return lambda p: sign * (p.get(field, 0) or 0)
+
+    def product_matches(self, product):
+        """Проходит ли товар текущие поиск и фильтры (каталог в памяти)"""
+        search_text, supplier_filter, category_filter, _ = self.filter_state()
+        if search_text.strip() and not self.product_search.filter([product], search_text):
+            return False
+        if supplier_filter != "Все поставщики" and product.get('s_name') != supplier_filter:
+            return False
+        return category_filter == "Все категории" or product.get('category_name') == category_filter
+
+    def filter_state(self):
+        """Текущие поиск, поставщик, категория и сортировка (без фильтров - значения «все»)"""
+        if self.role not in ["Менеджер", "Администратор"]:
+            return '', "Все поставщики", "Все категории", "Без сортировки"
+        return (self.search_input.text().lower(),
+                self.supplier_filter.currentText() or "Все поставщики",
+                self.category_filter.currentText() or "Все категории",
+                self.sort_combo.currentText())
+
+    def product_removed(self, article, refresh=True):
+        """Точечное удаление товара из кэша и таблицы"""
+        if self.loader.is_loading():
+            self.load_products()
+            return
 
-                    edit_btn = QPushButton("Редактировать")
-                    edit_btn.clicked.connect(lambda checked, p=product: self.edit_product(p))
-                    actions_layout.addWidget(edit_btn)
+        position = self.products_model.position_of(article)
+        if self.products_model.remove_product(article) and self.pager and self.pager.total:
+            self.pager.total -= 1
+
+        if not self.pager:
+            self.product_search.product_removed(article)
+            if self.product_columns is not None:
+                if position is not None:
+                    self.product_columns.delete(position)
+            elif refresh:
+                self.rebuild_columns()
+        self.update_count_label()
+
+    def apply_changes(self, changes):
+        """Применение пакета изменений {артикул: действие} из журнала к кэшу и таблице"""
+        for article, action in changes.items():
+            if action == DELETE:
+                self.product_removed(article, refresh=False)
+            else:
+                # Изменённый товар с незагруженной страницы появится при прокрутке
+                self.product_saved(article, insert=action == INSERT or not self.pager, refresh=False)
+        if not self.pager and self.product_columns is None:
+            # Колонки ещё строятся по кэшу до изменений (или не строились) - строим заново
+            self.rebuild_columns()
+
+    def on_reference_changes(self, changes):
+        """Справочники изменены (кэш уже сброшен): фильтры перечитываются"""
+        if self.role in ["Менеджер", "Администратор"] and ('suppliers' in changes or 'categories' in changes):
+            self.load_filters_data()
 
-                    delete_btn = QPushButton("Удалить")
-                    delete_btn.clicked.connect(lambda checked, p=product: self.delete_product(p))
-                    actions_layout.addWidget(delete_btn)
+    def hideEvent(self, event):
+        self.thumbnails.clear()
+        super().hideEvent(event)
 
-                    actions_widget.setLayout(actions_layout)
-                    self.products_table.setCellWidget(row, actions_col, actions_widget)
+    def on_products_failed(self, message):
+        QMessageBox.warning(self, "Ошибка", "Не удалось загрузить товары")
+        print(f"❌ Ошибка в load_products: {message}")
 
-                # Подсвечиваем строки
-                self.highlight_row(row, product, col_offset)
+    def display_products(self, products, pager=None):
+        """Отображение товаров в таблице"""
+        try:
+            self.products_model.set_products(products, pager)
 
         except Exception as e:
             print(f"❌ Ошибка в display_products: {e}")
 
+    def show_filtered(self, products):
+        """Показ отобранных товаров кэша: таблице передаются их позиции в кэше"""
+        position_of = self.products_model.position_of
+        self.products_model.set_rows([position_of(p.get('article')) for p in products])
+    def current_query(self):
+        """Запрос товаров по текущим значениям фильтров"""
+        if self.role not in ["Менеджер", "Администратор"]:
+            return ProductQuery()
+
+        return ProductQuery(
+            search_text=self.search_input.text(),
+            supplier_id=self.supplier_filter.currentData(),
+            category_id=self.category_filter.currentData(),
+            sort_option=self.sort_combo.currentText(),
+            search=self.product_search
+        )
+
     def apply_filters(self):
         """Применение фильтров и поиска"""
         try:
+            if self.pager:
+                # Фильтрация и сортировка выполняются в БД, загружается только первая страница
+                self.load_products(self.current_query())
+                return
+
+            if self.loader.is_loading():
+                # Каталог ещё загружается - фильтры применятся по её окончании
+                self.filters_pending = True
+                return
+
             if not self.all_products:
                 return
 
             # Получаем текущие значения фильтров
-            search_text = self.search_input.text().lower()
-            supplier_filter = self.supplier_filter.currentText()
-            category_filter = self.category_filter.currentText()
-            sort_option = self.sort_combo.currentText()
+            search_text, supplier_filter, category_filter, sort_option = self.filter_state()
+
+            if self.product_columns is not None:
+                # Маски по колонкам NumPy и готовые перестановки для сортировки;
+                # колонки построены по кэшу модели, поэтому их индексы - позиции в нём
+                # Нет совпадений по словам - маска поиска подстроки
+                scores = (self.product_search.rank(search_text) or None) if search_text.strip() else None
+                self.products_model.set_rows(self.product_columns.filter(
+                    search_text if search_text.strip() else '',
+                    scores,
+                    supplier_filter if supplier_filter != "Все поставщики" else None,
+                    category_filter if category_filter != "Все категории" else None,
+                    sort_option
+                ))
+                return
 
             # Начинаем со всех товаров
             filtered_products = self.all_products.copy()
 
-            # Применяем поиск
-            if search_text:
-                filtered_products = [
-                    p for p in filtered_products
-                    if (search_text in str(p.get('p_name', '')).lower() or
-                        search_text in str(p.get('article', '')).lower() or
-                        search_text in str(p.get('description', '')).lower() or
-                        search_text in str(p.get('b_name', '')).lower())
-                ]
+            # Применяем поиск (результаты упорядочены по релевантности)
+            if search_text.strip():
+                filtered_products = self.product_search.filter(filtered_products, search_text)
 
             # Применяем фильтр по поставщику
             if supplier_filter != "Все поставщики":
@@ -355,81 +588,51 @@ class ProductsWindow(QMainWindow):
                     filtered_products.sort(key=lambda x: x.get('discount_percent', 0) or 0, reverse=True)
 
             # Отображаем отфильтрованные товары
-            self.display_products(filtered_products)
+            self.show_filtered(filtered_products)
 
         except Exception as e:
             print(f"❌ Ошибка в apply_filters: {e}")
 
-    def highlight_row(self, row, product, col_offset=0):
-        """Подсветка строк в зависимости от условий"""
-        try:
-            discount = product.get('discount_percent', 0) or 0
-            quantity = product.get('quantity', 0) or 0
-
-            # Подсветка если скидка больше 15%
-            if discount > 15:
-                for col in range(self.products_table.columnCount()):
-                    item = self.products_table.item(row, col)
-                    if item:
-                        item.setBackground(QColor('#2E8B57'))
-
-            # Подсветка если товара нет в наличии
-            elif quantity == 0:
-                for col in range(self.products_table.columnCount()):
-                    item = self.products_table.item(row, col)
-                    if item:
-                        item.setBackground(QColor('#87CEEB'))
+    def show_filter_stats(self, runs, skipped):
+        """Сколько фильтраций выполнено и сколько поглощено более новым вводом"""
+        self.search_input.setToolTip(f"Фильтраций: {runs}, пропущено устаревших: {skipped}")
 
-        except Exception as e:
-            print(f"❌ Ошибка в highlight_row: {e}")
+    def update_count_label(self):
+        """Обновление надписи с количеством товаров"""
+        shown = self.products_model.rowCount()
+        total = self.pager.total if self.pager else None
+        if total is not None and total > shown and self.products_model.canFetchMore():
+            self.count_label.setText(f"Загружено товаров: {shown} из {total}")
+        else:
+            self.count_label.setText(f"Товаров: {shown}")
 
     def on_table_double_click(self, index):
         """Обработка двойного клика по таблице"""
         if self.role == "Администратор":
-            row = index.row()
-            product_data = {}
-            for col in range(9):  # Все колонки кроме действий
-                item = self.products_table.item(row, col)
-                if item:
-                    if col == 0:
-                        product_data['article'] = item.text()
-                    elif col == 1:
-                        product_data['p_name'] = item.text()
-                    elif col == 2:
-                        product_data['category_name'] = item.text()
-                    elif col == 3:
-                        product_data['b_name'] = item.text()
-                    elif col == 4:
-                        product_data['s_name'] = item.text()
-                    elif col == 5:
-                        price_text = item.text()
-                        if '→' in price_text:
-                            price_text = price_text.split('→')[1].strip().split(' ')[0]
-                        product_data['price'] = float(price_text)
-                    elif col == 6:
-                        product_data['quantity'] = int(item.text())
-                    elif col == 7:
-                        product_data['discount_percent'] = int(item.text())
-                    elif col == 8:
-                        product_data['description'] = item.text()
-
-            # Находим полные данные товара
-            for product in self.all_products:
-                if product.get('article') == product_data['article']:
-                    self.edit_product(product)
-                    break
+            self.edit_product(self.products_model.product_at(index.row()))
+
+    def product_dialog(self, product=None):
+        """Диалог товара: создаётся при первом открытии и затем переиспользуется"""
+        if self.dialog is None:
+            self.dialog = ProductDialog(self.db, self, product)
+            self.dialog.saved.connect(self.sync.skip)
+        else:
+            self.dialog.set_product(product)
+        return self.dialog
 
     def add_product(self):
         """Добавление нового товара"""
-        dialog = ProductDialog(self.db, self)
+        dialog = self.product_dialog()
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_products()  # Обновляем список
+            self.product_saved(dialog.saved_article)
+        self.collect_images()
 
     def edit_product(self, product):
         """Редактирование товара"""
-        dialog = ProductDialog(self.db, self, product)
+        dialog = self.product_dialog(product)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_products()  # Обновляем список
+            self.product_saved(dialog.saved_article)
+        self.collect_images()
 
     def delete_product(self, product):
         """Удаление товара"""
@@ -450,26 +653,37 @@ class ProductsWindow(QMainWindow):
                     QMessageBox.warning(self, "Ошибка", "Нельзя удалить товар, который присутствует в заказе!")
                     return
 
-                # Удаляем изображение если есть
-                if product.get('image_path'):
-                    try:
-                        if os.path.exists(product.get('image_path')):
-                            os.remove(product.get('image_path'))
-                    except Exception as e:
-                        print(f"Ошибка удаления файла: {e}")
-
                 # Удаляем товар из БД
                 delete_query = "DELETE FROM products WHERE article = %s"
-                self.db.execute_query(delete_query, (product.get('article'),))
+                if self.db.execute_query(delete_query, (product.get('article'),)) is None:
+                    # Ошибка запроса (соединение, внешний ключ) - товар остаётся в таблице
+                    QMessageBox.warning(self, "Ошибка", "Не удалось удалить товар")
+                    return
+                self.sync.skip(product.get('article'))
+
+                # Изображение может использоваться другими товарами - удалит сборка
+                image_store.release(product.get('image_path'))
+                self.collect_images()
 
                 QMessageBox.information(self, "Успех", "Товар успешно удален!")
-                self.load_products()
+                self.product_removed(product.get('article'))
 
             except Exception as e:
                 QMessageBox.critical(self, "Ошибка", f"Ошибка при удалении товара: {str(e)}")
 
+    def collect_images(self):
+        """Фоновое удаление изображений, на которые больше не ссылается ни один товар"""
+        self.loader.run(lambda: image_store.collect(self.db), self.on_images_collected)
+
+    def on_images_collected(self, removed):
+        for path in removed:
+            image_cache().invalidate(path)
+
     def open_orders_window(self):
         """Открытие окна заказов"""
+        if self.session:
+            self.session.show_orders()
+            return
         from orders_window import OrdersWindow
         self.orders_window = OrdersWindow(self.role, self.user_id, self.user_name, self.db)
         self.orders_window.show()
@@ -477,23 +691,42 @@ class ProductsWindow(QMainWindow):
 
     def go_back(self):
         """Возврат к выбору роли"""
+        if self.session:
+            self.session.end_session()
+            return
         from main import RoleSelectionWindow
-        self.role_window = RoleSelectionWindow()
+        self.role_window = RoleSelectionWindow(self.db)
         self.role_window.show()
         self.close()
 
 
 class ProductDialog(QDialog):
+    saved = pyqtSignal(str)  # артикул товара сразу после записи в БД
+
     def __init__(self, db, parent=None, product=None):
         super().__init__(parent)
         self.db = db
+        self.setModal(True)
+        self.setup_ui()
+        self.set_product(product)
+
+    def set_product(self, product=None):
+        """Подготовка формы к добавлению (None) или редактированию товара
+
+        Окно товаров переиспользует один диалог: виджеты создаются один раз,
+        здесь только сбрасываются значения.
+        """
         self.product = product
         self.current_image_path = None
         self.is_editing = product is not None
+        self.saved_article = None  # артикул сохранённого товара после accept()
+        self.cancel_image_task()
 
         self.setWindowTitle("Редактирование товара" if self.is_editing else "Добавление товара")
-        self.setModal(True)
-        self.setup_ui()
+        # Справочники обновляются из кэша (без изменений модели не сбрасываются)
+        for combo in (self.category_combo, self.brand_combo, self.supplier_combo):
+            combo.model().refresh(self.db)
+        self.clear_form()
 
         if self.is_editing:
             self.load_product_data()
@@ -512,19 +745,19 @@ class ProductDialog(QDialog):
         self.name_input = QLineEdit()
         form_layout.addRow("Наименование:", self.name_input)
 
-        # Категория
+        # Категория (модели справочников общие для всех форм)
         self.category_combo = QComboBox()
-        self.load_categories()
+        self.category_combo.setModel(reference_model(self.db, 'categories'))
         form_layout.addRow("Категория:", self.category_combo)
 
         # Производитель
         self.brand_combo = QComboBox()
-        self.load_brands()
+        self.brand_combo.setModel(reference_model(self.db, 'brands'))
         form_layout.addRow("Производитель:", self.brand_combo)
 
         # Поставщик
         self.supplier_combo = QComboBox()
-        self.load_suppliers()
+        self.supplier_combo.setModel(reference_model(self.db, 'suppliers'))
         form_layout.addRow("Поставщик:", self.supplier_combo)
 
         # Цена
@@ -553,14 +786,24 @@ class ProductDialog(QDialog):
         self.image_btn = QPushButton("Выбрать изображение")
         self.image_btn.clicked.connect(self.select_image)
         self.image_label = QLabel("Изображение не выбрано")
+        self.image_preview = QLabel()
+        self.image_preview.setFixedSize(150, 100)
+        self.image_preview.setAlignment(Qt.AlignmentFlag.AlignCenter)
         image_layout.addWidget(self.image_btn)
         image_layout.addWidget(self.image_label)
+        image_layout.addWidget(self.image_preview)
         form_layout.addRow("Изображение:", image_layout)
 
+        # Изображения обрабатываются в пуле потоков кэша миниатюр
+        self.image_loader = BackgroundLoader(self, image_cache().loader.thread_pool)
+        self.image_task = None
+        image_cache().ready.connect(self.on_thumbnail_ready)
+        image_cache().failed.connect(self.on_thumbnail_ready)
+
         layout.addLayout(form_layout)
 
         # Кнопки
-        button_box = QDialogButtonBox(
+        button_box = self.button_box = QDialogButtonBox(
             QDialogButtonBox.StandardButton.Ok |
             QDialogButtonBox.StandardButton.Cancel
         )
@@ -570,29 +813,18 @@ class ProductDialog(QDialog):
 
         self.setLayout(layout)
 
-    def load_categories(self):
-        """Загрузка категорий"""
-        categories = self.db.execute_query("SELECT id, category_name FROM categories")
-        self.category_combo.clear()
-        if categories:
-            for category in categories:
-                self.category_combo.addItem(category['category_name'], category['id'])
-
-    def load_brands(self):
-        """Загрузка брендов"""
-        brands = self.db.execute_query("SELECT id, b_name FROM brends")
-        self.brand_combo.clear()
-        if brands:
-            for brand in brands:
-                self.brand_combo.addItem(brand['b_name'], brand['id'])
-
-    def load_suppliers(self):
-        """Загрузка поставщиков"""
-        suppliers = self.db.execute_query("SELECT id, s_name FROM suppliers")
-        self.supplier_combo.clear()
-        if suppliers:
-            for supplier in suppliers:
-                self.supplier_combo.addItem(supplier['s_name'], supplier['id'])
+    def clear_form(self):
+        """Пустая форма нового товара"""
+        self.article_input.clear()
+        self.name_input.clear()
+        self.price_input.setValue(0)
+        self.quantity_input.setValue(0)
+        self.discount_input.setValue(0)
+        self.description_input.clear()
+        self.image_label.setText("Изображение не выбрано")
+        self.image_preview.clear()
+        for combo in (self.category_combo, self.brand_combo, self.supplier_combo):
+            combo.setCurrentIndex(0 if combo.count() else -1)
 
     def load_product_data(self):
         """Загрузка данных товара для редактирования"""
@@ -607,32 +839,20 @@ class ProductDialog(QDialog):
         self.description_input.setText(self.product.get('description', ''))
 
         # Устанавливаем выбранные значения в комбобоксы
-        category_name = self.product.get('category_name')
-        if category_name:
-            index = self.category_combo.findText(category_name)
-            if index >= 0:
-                self.category_combo.setCurrentIndex(index)
-
-        brand_name = self.product.get('b_name')
-        if brand_name:
-            index = self.brand_combo.findText(brand_name)
-            if index >= 0:
-                self.brand_combo.setCurrentIndex(index)
-
-        supplier_name = self.product.get('s_name')
-        if supplier_name:
-            index = self.supplier_combo.findText(supplier_name)
-            if index >= 0:
-                self.supplier_combo.setCurrentIndex(index)
+        for combo, field in ((self.category_combo, 'category_id'),
+                             (self.brand_combo, 'brend_id'),
+                             (self.supplier_combo, 'supplier_id')):
+            combo.model().select_in(combo, self.product.get(field))
 
         # Загружаем путь к изображению
         image_path = self.product.get('image_path')
         if image_path and os.path.exists(image_path):
             self.current_image_path = image_path
             self.image_label.setText(os.path.basename(image_path))
+            self.show_preview()
 
     def select_image(self):
-        """Выбор изображения"""
+        """Выбор изображения; уменьшение и сохранение выполняются в фоне"""
         file_path, _ = QFileDialog.getOpenFileName(
             self,
             "Выберите изображение",
@@ -641,26 +861,68 @@ class ProductDialog(QDialog):
         )
 
         if file_path:
-            try:
-                # Создаем папку для изображений если её нет
-                if not os.path.exists("product_images"):
-                    os.makedirs("product_images")
-
-                # Обрабатываем изображение
-                with Image.open(file_path) as img:
-                    # Изменяем размер
-                    img = img.resize((300, 200))
+            # Пока изображение обрабатывается, сохранить товар нельзя
+            self.set_image_busy(True)
+            self.image_label.setText("Обработка изображения...")
+            self.image_task = self.image_loader.run(
+                lambda: image_store.store(file_path),
+                self.on_image_saved,
+                self.on_image_failed
+            )
+
+    def on_image_saved(self, path):
+        self.image_task = None
+        self.set_image_busy(False)
+        if self.current_image_path not in (path, self.original_image_path()):
+            # Изображение, выбранное в этой форме ранее, больше не нужно
+            image_store.release(self.current_image_path)
+        self.current_image_path = path
+        self.image_label.setText(os.path.basename(path))
+        self.show_preview()
+
+    def on_image_failed(self, message):
+        self.image_task = None
+        self.set_image_busy(False)
+        self.image_label.setText(os.path.basename(self.current_image_path) if self.current_image_path
+                                 else "Изображение не выбрано")
+        QMessageBox.warning(self, "Ошибка", f"Не удалось обработать изображение: {message}")
+
+    def cancel_image_task(self):
+        """Отмена обработки изображения, выбранного для предыдущего товара"""
+        if self.image_task is not None:
+            self.image_loader.discard(self.image_task)
+            self.image_task = None
+        self.set_image_busy(False)
+
+    def set_image_busy(self, busy):
+        self.image_btn.setEnabled(not busy)
+        self.button_box.button(QDialogButtonBox.StandardButton.Ok).setEnabled(not busy)
+
+    def show_preview(self):
+        """Миниатюра текущего изображения из кэша (или после фоновой загрузки)"""
+        pixmap = image_cache().request(self.current_image_path, 'medium')
+        if pixmap is not None:
+            self.image_preview.setPixmap(pixmap)
+        elif image_cache().is_loading(self.current_image_path):
+            self.image_preview.setText("Загрузка...")
+        else:
+            self.image_preview.setText("Нет превью")
 
-                    # Сохраняем в папку приложения
-                    filename = f"product_{self.article_input.text() or 'new'}.png"
-                    save_path = os.path.join("product_images", filename)
-                    img.save(save_path)
+    def on_thumbnail_ready(self, path):
+        if path == self.current_image_path:
+            self.show_preview()
 
-                    self.current_image_path = save_path
-                    self.image_label.setText(os.path.basename(save_path))
+    def original_image_path(self):
+        return self.product.get('image_path') if self.product else None
 
-            except Exception as e:
-                QMessageBox.warning(self, "Ошибка", f"Не удалось обработать изображение: {str(e)}")
+    def done(self, result):
+        """Закрытие формы: неиспользуемое изображение отдаётся на сборку"""
+        self.cancel_image_task()
+        original = self.original_image_path()
+        if self.current_image_path != original:
+            # Сохранено - не нужно прежнее изображение товара, отменено - выбранное в форме
+            image_store.release(original if result == QDialog.DialogCode.Accepted else self.current_image_path)
+        super().done(result)
 
     def accept(self):
         """Сохранение товара"""
@@ -741,6 +1003,8 @@ class ProductDialog(QDialog):
 
             result = self.db.execute_query(query, params)
             if result is not None:
+                self.saved_article = self.product.get('article') if self.is_editing else self.article_input.text()
+                self.saved.emit(self.saved_article)
                 QMessageBox.information(self, "Успех",
                                         "Товар успешно обновлен!" if self.is_editing else "Товар успешно добавлен!")
                 super().accept()
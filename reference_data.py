@@ -0,0 +1,74 @@
+from database import statements
+import threading
+import time
+
+
+# Справочники для фильтров и форм товаров и заказов
+statements.register('suppliers', "SELECT id, s_name FROM suppliers")
+statements.register('categories', "SELECT id, category_name FROM categories")
+statements.register('brands', "SELECT id, b_name FROM brends")
+statements.register('pickup_points', """
+                    SELECT id, CONCAT(city, ', ', street, ', д. ', num_house) as address
+                    FROM take_points
+                    """)
+statements.register('clients', """
+                    SELECT id, CONCAT(u_name, ' ', surname) as full_name
+                    FROM users
+                    WHERE role_id = 3 -- Только клиенты
+                    """)
+
+
+class ReferenceCache:
+    """Общий для всех окон и диалогов кэш справочников
+
+    Строки справочника (именованного запроса) хранятся TTL секунд, после чего
+    читаются заново; invalidate() сбрасывает справочник сразу. Ошибки запроса
+    не кэшируются. Кэш потокобезопасен: справочники загружаются и в фоне.
+    """
+
+    TTL = 300  # секунд
+
+    def __init__(self, ttl=TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}  # имя запроса -> (момент устаревания, строки)
+        self._lock = threading.Lock()
+
+    def get(self, db, name):
+        """Строки справочника из кэша или одним запросом к БД (None - ошибка)"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry and entry[0] > self.clock():
+                self.hits += 1
+                return entry[1]
+
+        rows = db.execute_named(name)
+        if rows is None:
+            return None
+
+        rows = tuple(rows)
+        with self._lock:
+            self.misses += 1
+            self._entries[name] = (self.clock() + self.ttl, rows)
+        return rows
+
+    def prefetch(self, db, *names):
+        """Загрузка справочников заранее, чтобы формы открывались без запросов"""
+        return tuple(self.get(db, name) for name in names)
+
+    def invalidate(self, name=None):
+        """Сброс одного справочника или всех"""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'cached': sorted(self._entries)}
+
+
+reference_data = ReferenceCache()
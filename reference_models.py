@@ -0,0 +1,71 @@
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
+from reference_data import reference_data
+
+
+# Поле с текстом элемента для каждого справочника
+TEXT_FIELDS = {
+    'suppliers': 's_name',
+    'categories': 'category_name',
+    'brands': 'b_name',
+    'pickup_points': 'address',
+    'clients': 'full_name',
+}
+
+
+class ReferenceModel(QAbstractListModel):
+    """Справочник для комбобоксов форм: один на процесс, выбор элемента по id за O(1)
+
+    Текст элемента - DisplayRole, id - UserRole (его возвращает QComboBox.currentData()).
+    """
+
+    def __init__(self, name, parent=None):
+        super().__init__(parent)
+        self.name = name
+        self.text_field = TEXT_FIELDS[name]
+        self._rows = ()
+        self._row_by_id = {}
+
+    def refresh(self, db):
+        """Обновление из кэша справочников; без изменений в кэше модель не сбрасывается"""
+        rows = reference_data.get(db, self.name)
+        if rows is None or rows is self._rows:
+            return
+        self.beginResetModel()
+        self._rows = rows
+        self._row_by_id = {row['id']: position for position, row in enumerate(rows)}
+        self.endResetModel()
+
+    def row_of(self, item_id):
+        """Номер строки элемента с данным id или -1"""
+        return self._row_by_id.get(item_id, -1)
+
+    def select_in(self, combo, item_id):
+        """Выбор элемента по id в комбобоксе с этой моделью без перебора строк"""
+        row = self.row_of(item_id)
+        if row >= 0:
+            combo.setCurrentIndex(row)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return row[self.text_field]
+        if role == Qt.ItemDataRole.UserRole:
+            return row['id']
+        return None
+
+
+_models = {}
+
+
+def reference_model(db, name):
+    """Общая модель справочника, обновлённая из кэша"""
+    model = _models.get(name)
+    if model is None:
+        model = _models[name] = ReferenceModel(name)
+    model.refresh(db)
+    return model
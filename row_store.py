@@ -0,0 +1,80 @@
+import sys
+
+
+class Record:
+    """Строка результата запроса с __slots__ вместо словаря
+
+    Имена полей хранятся один раз в классе, а не в каждой строке. Доступ как
+    у словаря строки DictCursor: record['article'], record.get('price', 0).
+    Значения полей из INTERNED (названия из справочников) интернируются,
+    поэтому одинаковые названия во всех строках - один и тот же объект.
+    """
+
+    __slots__ = ()
+    INTERNED = ()
+
+    @classmethod
+    def from_row(cls, row):
+        """Запись из словаря строки; отсутствующие поля равны None"""
+        record = cls.__new__(cls)
+        for field in cls.__slots__:
+            value = row.get(field)
+            if field in cls.INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(record, field, value)
+        return record
+
+    def get(self, field, default=None):
+        if field in self.__slots__:
+            return getattr(self, field)
+        return default
+
+    def __getitem__(self, field):
+        if field not in self.__slots__:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __setitem__(self, field, value):
+        if field not in self.__slots__:
+            raise KeyError(field)
+        setattr(self, field, value)
+
+    def __contains__(self, field):
+        return field in self.__slots__
+
+    def keys(self):
+        return self.__slots__
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class ProductRecord(Record):
+    """Товар в кэше окна товаров"""
+
+    __slots__ = ('article', 'p_name', 'category_name', 'b_name', 's_name', 'price',
+                 'quantity', 'discount_percent', 'description', 'image_path', 'id', 'relevance',
+                 'category_id', 'brend_id', 'supplier_id')
+    INTERNED = ('category_name', 'b_name', 's_name')
+
+
+class OrderRecord(Record):
+    """Заказ в кэше окна заказов"""
+
+    __slots__ = ('receipt_code', 'order_status', 'pickup_address', 'order_date',
+                 'delivery_date', 'client_name', 'id', 'pickup_point_id', 'client_id')
+    INTERNED = ('order_status', 'pickup_address', 'client_name')
+
+
+def as_records(rows, record_class):
+    """Преобразование строк (списка или потока) в записи по мере перебора"""
+    try:
+        for row in rows:
+            yield record_class.from_row(row)
+    finally:
+        # Прерванный перебор закрывает и исходный поток строк
+        if hasattr(rows, 'close'):
+            rows.close()
@@ -0,0 +1,88 @@
+from database import Database
+
+
+class SessionManager:
+    """Окна приложения и подключение к БД на всё время работы
+
+    Одно подключение (пул) на процесс. Окна товаров и заказов создаются один
+    раз на сессию пользователя и при переходах скрываются, а не закрываются,
+    поэтому загруженные данные, фильтры и прокрутка сохраняются, а переход
+    между окнами не обращается к БД.
+    """
+
+    def __init__(self, db=None):
+        self.db = db or Database()
+        self.user = None  # (роль, id пользователя, имя) текущей сессии
+        self.role_window = None
+        self.login_windows = {}  # роль -> окно авторизации
+        self.products_window = None
+        self.orders_window = None
+        self.current = None  # показанное окно
+
+    def show_role_selection(self):
+        """Окно выбора роли"""
+        if self.role_window is None:
+            from main import RoleSelectionWindow
+            self.role_window = RoleSelectionWindow(self.db, self)
+        self._switch(self.role_window)
+
+    def show_login(self, role):
+        """Окно авторизации для роли"""
+        window = self.login_windows.get(role)
+        if window is None:
+            from main import LoginWindow
+            window = self.login_windows[role] = LoginWindow(role, self.db, self)
+        window.password_input.clear()
+        self._switch(window)
+
+    def start_session(self, role, user_id, user_name):
+        """Вход пользователя; окна прежнего пользователя закрываются"""
+        user = (role, user_id, user_name)
+        if user != self.user:
+            self._dispose_windows()
+            self.user = user
+        self.show_products()
+
+    def end_session(self):
+        """Выход к выбору роли; окна остаются до входа другого пользователя"""
+        self.show_role_selection()
+
+    def show_products(self):
+        """Окно товаров текущего пользователя"""
+        if self.products_window is None:
+            from products_window import ProductsWindow
+            self.products_window = ProductsWindow(*self.user, self.db, session=self)
+        self._switch(self.products_window)
+
+    def show_orders(self):
+        """Окно заказов текущего пользователя"""
+        if self.orders_window is None:
+            from orders_window import OrdersWindow
+            self.orders_window = OrdersWindow(*self.user, self.db, session=self)
+        self._switch(self.orders_window)
+
+    def close(self):
+        """Завершение работы: окна и подключение к БД"""
+        self._dispose_windows()
+        self.db.close()
+
+    def _switch(self, window):
+        if self.current is not None and self.current is not window:
+            # Предыдущее окно только скрывается вместе со своим состоянием
+            self.current.hide()
+        self.current = window
+        window.show()
+        window.raise_()
+        window.activateWindow()
+
+    def _dispose_windows(self):
+        for window in (self.products_window, self.orders_window):
+            if window is None:
+                continue
+            window.loader.cancel(notify=False)
+            if window is self.current:
+                self.current = None
+            window.hide()
+            window.deleteLater()
+        self.products_window = None
+        self.orders_window = None
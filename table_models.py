@@ -0,0 +1,497 @@
+from PyQt6.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QEvent, QRect, pyqtSignal
+from PyQt6.QtGui import QColor
+from image_cache import image_cache, placeholder
+from background import BackgroundLoader
+
+try:
+    import numpy as np
+except ImportError:  # позиции показанных товаров хранятся только списком
+    np = None
+
+
+# Цвета подсветки создаются один раз, а не для каждой ячейки
+DISCOUNT_COLOR = QColor('#2E8B57')
+OUT_OF_STOCK_COLOR = QColor('#87CEEB')
+PRICE_DISCOUNT_COLOR = QColor('red')
+STATUS_COLORS = {
+    'Завершен': QColor('#90EE90'),  # Светло-зеленый
+    'Новый': QColor('#FFB6C1'),  # Светло-розовый
+}
+
+
+class ProductsTableModel(QAbstractTableModel):
+    """Модель таблицы товаров: ячейки формируются только при отрисовке
+
+    Модель хранит кэш окна (список всех загруженных товаров) и индекс
+    артикул -> позиция в нём. Отфильтрованная таблица - это позиции показанных
+    товаров (set_rows: список или массив NumPy), а не новый список товаров. Новые товары
+    добавляются в конец кэша, поэтому позиции остальных не меняются.
+    """
+
+    paging_changed = pyqtSignal()  # догрузка страниц подключена или прекращена
+
+    def __init__(self, role, parent=None):
+        super().__init__(parent)
+        self.role = role
+        self._products = []  # кэш окна
+        self._rows = None  # позиции показанных товаров в _products (None - все по порядку)
+        self._positions = {}  # артикул -> позиция в _products
+        self._positions_valid = True  # после удаления индекс перестраивается при обращении
+        self._row_of_position = None  # обратный к _rows индекс, строится при обращении
+        self._pager = None
+        self._inserted = set()  # артикулы, добавленные вне загрузки страниц
+        self._loader = None  # фоновая догрузка страниц, создаётся при первой прокрутке
+        self._fetch = None  # (pager, номер задачи) загружаемой сейчас страницы
+
+        if self.role == "Администратор":
+            self.columns = ['image', 'article', 'p_name', 'category_name', 'b_name', 's_name',
+                            'price', 'quantity', 'discount_percent', 'description', 'actions']
+            self.headers = ["Фото", "Артикул", "Наименование", "Категория", "Производитель", "Поставщик",
+                            "Цена", "Количество", "Скидка %", "Описание", "Действия"]
+        else:
+            self.columns = ['image', 'article', 'p_name', 'category_name', 'b_name',
+                            'price', 'quantity', 'discount_percent', 'description']
+            self.headers = ["Фото", "Артикул", "Наименование", "Категория", "Производитель",
+                            "Цена", "Количество", "Скидка %", "Описание"]
+
+    def set_products(self, products, pager=None):
+        """Замена кэша товаров без построения ячеек
+
+        Если передан pager, следующие страницы догружаются по мере прокрутки.
+        """
+        self.beginResetModel()
+        self._products = products
+        self._rows = None
+        self._positions = {}
+        self._positions_valid = not products
+        self._row_of_position = None
+        self._pager = pager
+        self._inserted = set()
+        self.cancel_fetch()
+        self.endResetModel()
+
+    def set_rows(self, rows):
+        """Показ товаров кэша с данными позициями в данном порядке (None - всех)"""
+        self.beginResetModel()
+        self._rows = rows
+        self._row_of_position = None
+        self.endResetModel()
+
+    def set_pager(self, pager):
+        """Подключение догрузки страниц к уже показанным товарам"""
+        if pager is not self._pager:
+            self.cancel_fetch()
+        self._pager = pager
+        self.paging_changed.emit()
+
+    def append_products(self, products):
+        """Добавление товаров в конец таблицы"""
+        if self._inserted:
+            # Уже вставленный вручную товар не дублируется при догрузке страницы
+            products = [p for p in products if p.get('article') not in self._inserted]
+        if not products:
+            return
+        first = self.rowCount()
+        position = len(self._products)
+        self.beginInsertRows(QModelIndex(), first, first + len(products) - 1)
+        self._products.extend(products)
+        if self._positions_valid:
+            for offset, product in enumerate(products):
+                self._positions[product.get('article')] = position + offset
+        if isinstance(self._rows, list):
+            self._rows.extend(range(position, len(self._products)))
+        elif self._rows is not None:
+            self._rows = np.concatenate((self._rows, np.arange(position, len(self._products))))
+        self._row_of_position = None
+        self.endInsertRows()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return (not parent.isValid() and self._pager is not None and self._fetch is None
+                and self._pager.has_more())
+
+    def fetchMore(self, parent=QModelIndex()):
+        """Запрос следующей страницы в пуле потоков; строки добавляются по готовности"""
+        if parent.isValid() or self._pager is None or self._fetch is not None:
+            return
+        if self._loader is None:
+            self._loader = BackgroundLoader(self)
+        pager = self._pager
+        task_id = self._loader.run(pager.next_page,
+                                   lambda page: self.on_page_fetched(pager, page),
+                                   lambda message: self.on_page_fetched(pager, None))
+        self._fetch = (pager, task_id)
+
+    def cancel_fetch(self):
+        """Отмена догрузки страницы: её результат больше не нужен"""
+        if self._fetch is not None:
+            self._loader.discard(self._fetch[1])
+            self._fetch = None
+
+    def on_page_fetched(self, pager, page):
+        if self._fetch is None or self._fetch[0] is not pager:
+            return  # кэш заменён, пока загружалась страница
+        self._fetch = None
+        if page is None:
+            # Ошибка запроса: прекращаем догрузку, чтобы не повторять её на каждой прокрутке
+            self._pager = None
+            self.paging_changed.emit()
+            return
+        self.append_products(page)
+
+    def product_at(self, row):
+        """Товар по номеру строки"""
+        if self._rows is None:
+            return self._products[row]
+        return self._products[self._rows[row]]
+
+    def products(self):
+        """Кэш товаров (все загруженные, а не только показанные)"""
+        return self._products
+
+    def position_of(self, article):
+        """Позиция товара в кэше или None"""
+        if not self._positions_valid:
+            self._positions = {product.get('article'): position
+                               for position, product in enumerate(self._products)}
+            self._positions_valid = True
+        return self._positions.get(article)
+
+    def product(self, article):
+        """Товар из кэша по артикулу или None"""
+        position = self.position_of(article)
+        return None if position is None else self._products[position]
+
+    def row_of(self, article):
+        """Номер строки товара в таблице или None (товара нет или он не показан)"""
+        position = self.position_of(article)
+        if position is None or self._rows is None:
+            return position
+        if self._row_of_position is None:
+            self._row_of_position = self._inverse_rows()
+        if isinstance(self._row_of_position, dict):
+            return self._row_of_position.get(position)
+        row = int(self._row_of_position[position])
+        return row if row >= 0 else None
+
+    def _inverse_rows(self):
+        """Индекс позиция -> строка для показанных товаров"""
+        if isinstance(self._rows, list):
+            return {position: row for row, position in enumerate(self._rows)}
+        inverse = np.full(len(self._products), -1, np.intp)
+        inverse[self._rows] = np.arange(len(self._rows))
+        return inverse
+
+    def update_product(self, product):
+        """Замена товара в кэше; если он показан, перерисовывается только его строка"""
+        position = self.position_of(product.get('article'))
+        if position is None:
+            return False
+        self._products[position] = product
+        row = self.row_of(product.get('article'))
+        if row is not None:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.columns) - 1))
+        return True
+
+    def insert_product(self, product, row=0):
+        """Добавление товара в конец кэша с показом в строке row (None - без показа)"""
+        position = len(self._products)
+        if self._rows is None and row != position:
+            # Показ не по порядку кэша - строки становятся списком позиций
+            self._rows = list(range(position))
+        if self._rows is None:
+            self.beginInsertRows(QModelIndex(), row, row)
+        self._products.append(product)
+        if self._positions_valid:
+            self._positions[product.get('article')] = position
+        self._row_of_position = None
+        self._inserted.add(product.get('article'))
+        if self._rows is None:
+            self.endInsertRows()
+        elif row is not None:
+            self._show(position, row)
+
+    def show_product(self, article, row):
+        """Показ скрытого товара кэша в строке row"""
+        position = self.position_of(article)
+        if position is None or self.row_of(article) is not None:
+            return False
+        self._show(position, row)
+        return True
+
+    def hide_product(self, article):
+        """Скрытие строки товара; сам товар остаётся в кэше"""
+        row = self.row_of(article)
+        if row is None:
+            return False
+        if self._rows is None:
+            self._rows = list(range(len(self._products)))
+        self.beginRemoveRows(QModelIndex(), row, row)
+        if isinstance(self._rows, list):
+            del self._rows[row]
+        else:
+            self._rows = np.delete(self._rows, row)
+        self._row_of_position = None
+        self.endRemoveRows()
+        return True
+
+    def _show(self, position, row):
+        self.beginInsertRows(QModelIndex(), row, row)
+        if isinstance(self._rows, list):
+            self._rows.insert(row, position)
+        else:
+            self._rows = np.insert(self._rows, row, position)
+        self._row_of_position = None
+        self.endInsertRows()
+
+    def remove_product(self, article):
+        """Удаление товара из кэша и, если он показан, его строки"""
+        position = self.position_of(article)
+        if position is None:
+            return False
+        row = self.row_of(article)
+        if row is not None:
+            self.beginRemoveRows(QModelIndex(), row, row)
+        del self._products[position]
+        self._inserted.discard(article)
+        # Позиции товаров после удалённого сдвинулись
+        self._positions_valid = False
+        if isinstance(self._rows, list):
+            self._rows = [p - (p > position) for p in self._rows if p != position]
+        elif self._rows is not None:
+            rows = self._rows[self._rows != position]
+            rows[rows > position] -= 1
+            self._rows = rows
+        self._row_of_position = None
+        if row is not None:
+            self.endRemoveRows()
+        return True
+
+    def image_path(self, row):
+        """Путь к изображению товара в строке или None"""
+        return self.product_at(row).get('image_path') if 0 <= row < self.rowCount() else None
+
+    def actions_column(self):
+        """Номер колонки действий или -1"""
+        return self.columns.index('actions') if 'actions' in self.columns else -1
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._products) if self._rows is None else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        product = self.product_at(index.row())
+        column = self.columns[index.column()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.display_text(product, column)
+
+        if role == Qt.ItemDataRole.DecorationRole:
+            if column != 'image' or not product.get('image_path'):
+                return None
+            # Только из кэша: загрузку видимых строк запускает ViewportThumbnails
+            return image_cache().pixmap(product.get('image_path')) or placeholder()
+
+        if role == Qt.ItemDataRole.UserRole:
+            # Ключ товара для поиска в кэше окна
+            return product.get('article')
+
+        if role == Qt.ItemDataRole.ForegroundRole:
+            if column == 'price' and (product.get('discount_percent', 0) or 0) > 0:
+                return PRICE_DISCOUNT_COLOR
+            return None
+
+        if role == Qt.ItemDataRole.BackgroundRole:
+            # Подсветка если скидка больше 15%, иначе если товара нет в наличии
+            if (product.get('discount_percent', 0) or 0) > 15:
+                return DISCOUNT_COLOR
+            if (product.get('quantity', 0) or 0) == 0:
+                return OUT_OF_STOCK_COLOR
+            return None
+
+        return None
+
+    def display_text(self, product, column):
+        """Текст ячейки для колонки товара"""
+        if column in ('actions', 'image'):
+            return None
+
+        if column == 'price':
+            price = float(product.get('price', 0) or 0)
+            discount = int(product.get('discount_percent', 0) or 0)
+            if discount > 0:
+                final_price = price * (1 - discount / 100)
+                return f"~~{price:.2f}~~ → {final_price:.2f} ₽"
+            return f"{price:.2f} ₽"
+
+        if column in ('quantity', 'discount_percent'):
+            return str(int(product.get(column, 0) or 0))
+
+        if column == 'description':
+            description = str(product.get('description', ''))
+            return description[:100] + "..." if len(description) > 100 else description
+
+        return str(product.get(column, ''))
+
+
+class OrdersTableModel(QAbstractTableModel):
+    """Модель таблицы заказов: статус подсвечивается через роли данных"""
+
+    def __init__(self, role, parent=None):
+        super().__init__(parent)
+        self.role = role
+        self._orders = []
+
+        if self.role == "Администратор":
+            self.columns = ['receipt_code', 'order_status', 'pickup_address',
+                            'order_date', 'delivery_date', 'client_name', 'actions']
+            self.headers = ["Артикул заказа", "Статус заказа", "Адрес пункта выдачи",
+                            "Дата заказа", "Дата доставки", "Клиент", "Действия"]
+        else:
+            self.columns = ['receipt_code', 'order_status', 'pickup_address',
+                            'order_date', 'delivery_date']
+            self.headers = ["Артикул заказа", "Статус заказа", "Адрес пункта выдачи",
+                            "Дата заказа", "Дата доставки"]
+
+    def set_orders(self, orders):
+        """Замена набора заказов без построения ячеек"""
+        self.beginResetModel()
+        self._orders = orders
+        self.endResetModel()
+
+    def append_orders(self, orders):
+        """Добавление заказов в конец таблицы"""
+        if not orders:
+            return
+        first = len(self._orders)
+        self.beginInsertRows(QModelIndex(), first, first + len(orders) - 1)
+        self._orders.extend(orders)
+        self.endInsertRows()
+
+    def order_at(self, row):
+        """Заказ по номеру строки"""
+        return self._orders[row]
+
+    def orders(self):
+        """Показанный список заказов"""
+        return self._orders
+
+    def update_order(self, row, order):
+        """Замена заказа в строке; перерисовывается только эта строка"""
+        self._orders[row] = order
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.columns) - 1))
+
+    def insert_order(self, row, order):
+        """Вставка одного заказа"""
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._orders.insert(row, order)
+        self.endInsertRows()
+
+    def remove_order(self, row):
+        """Удаление одной строки"""
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._orders[row]
+        self.endRemoveRows()
+
+    def actions_column(self):
+        """Номер колонки действий или -1"""
+        return self.columns.index('actions') if 'actions' in self.columns else -1
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._orders)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        order = self._orders[index.row()]
+        column = self.columns[index.column()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 'actions':
+                return None
+            return str(order.get(column, ''))
+
+        if role == Qt.ItemDataRole.BackgroundRole and column == 'order_status':
+            return STATUS_COLORS.get(order.get('order_status'))
+
+        return None
+
+
+class ActionsDelegate(QStyledItemDelegate):
+    """Рисует кнопки «Редактировать»/«Удалить» вместо виджета в каждой строке"""
+
+    edit_clicked = pyqtSignal(int)
+    delete_clicked = pyqtSignal(int)
+
+    BUTTONS = ("Редактировать", "Удалить")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pressed = None  # (строка, номер кнопки)
+
+    def button_rects(self, rect):
+        """Области кнопок внутри ячейки"""
+        width = rect.width() // len(self.BUTTONS)
+        return [QRect(rect.left() + i * width + 2, rect.top() + 2, width - 4, rect.height() - 4)
+                for i in range(len(self.BUTTONS))]
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+
+        style = option.widget.style() if option.widget else QApplication.style()
+        for i, rect in enumerate(self.button_rects(option.rect)):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = self.BUTTONS[i]
+            button.state = QStyle.StateFlag.State_Enabled
+            if self._pressed == (index.row(), i):
+                button.state |= QStyle.StateFlag.State_Sunken
+            else:
+                button.state |= QStyle.StateFlag.State_Raised
+            style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() not in (QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonRelease,
+                                QEvent.Type.MouseButtonDblClick):
+            return False
+
+        position = event.position().toPoint()
+        clicked = None
+        for i, rect in enumerate(self.button_rects(option.rect)):
+            if rect.contains(position):
+                clicked = i
+                break
+
+        if event.type() == QEvent.Type.MouseButtonPress:
+            self._pressed = (index.row(), clicked) if clicked is not None else None
+        elif event.type() == QEvent.Type.MouseButtonRelease:
+            if clicked is not None and self._pressed == (index.row(), clicked):
+                if clicked == 0:
+                    self.edit_clicked.emit(index.row())
+                else:
+                    self.delete_clicked.emit(index.row())
+            self._pressed = None
+
+        # Двойной клик по кнопкам не должен открывать редактирование строки
+        return clicked is not None
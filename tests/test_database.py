@@ -0,0 +1,25 @@
+import pytest
+
+from database import classify, READ, WRITE, DDL
+
+
+@pytest.mark.parametrize('query, kind', [
+    ("SELECT * FROM products", READ),
+    ("  select id from orders", READ),
+    ("(SELECT 1) UNION (SELECT 2)", READ),
+    ("-- комментарий\nSELECT 1", READ),
+    ("/* INSERT */ SELECT 1", READ),
+    ("SHOW TABLES", READ),
+    ("EXPLAIN SELECT 1", READ),
+    ("INSERT INTO orders VALUES (1)", WRITE),
+    ("UPDATE products SET price = 1", WRITE),
+    ("DELETE FROM orders WHERE id = %s", WRITE),
+    ("REPLACE INTO sequences VALUES ('a', 1)", WRITE),
+    ("CREATE INDEX idx ON products (price)", DDL),
+    ("DROP TABLE change_log", DDL),
+    ("WITH t AS (SELECT 1) SELECT * FROM t", READ),
+    ("WITH t AS (SELECT 'UPDATE' AS word) SELECT * FROM t", READ),
+    ("WITH t AS (SELECT id FROM orders) DELETE FROM orders WHERE id IN (SELECT id FROM t)", WRITE),
+])
+def test_classify(query, kind):
+    assert classify(query) == kind
@@ -0,0 +1,43 @@
+from datetime import date
+
+import pytest
+
+pytest.importorskip('PyQt6')
+
+from orders_window import order_row, sorted_row
+from row_store import OrderRecord
+
+
+def make_order(order_id, order_date):
+    return OrderRecord.from_row({'id': order_id, 'order_date': order_date})
+
+
+def ordered():
+    """Заказы в порядке ORDER BY order_date DESC: несколько с одной датой, без даты - в конце"""
+    dates = [date(2024, 5, 3)] * 3 + [date(2024, 5, 2), date(2024, 5, 1)] * 2 + [None, None]
+    orders = [make_order(i, d) for i, d in enumerate(dates)]
+    orders.sort(key=lambda o: -o.order_date.toordinal() if o.order_date else 0)
+    return orders
+
+
+def test_order_row_finds_each_order_by_identity():
+    orders = ordered()
+    for row, order in enumerate(orders):
+        assert order_row(orders, order) == row
+
+
+def test_order_row_ignores_equal_order_not_in_list():
+    orders = ordered()
+    assert order_row(orders, make_order(0, date(2024, 5, 3))) is None
+    assert order_row(orders, make_order(0, date(2023, 1, 1))) is None
+    assert order_row([], orders[0]) is None
+
+
+def test_sorted_row_keeps_date_order():
+    orders = ordered()
+    new = make_order(100, date(2024, 5, 2))
+    row = sorted_row(orders, new)
+    orders.insert(row, new)
+    # После последнего заказа с той же датой, перед более ранними
+    assert orders[row - 1].order_date == date(2024, 5, 2)
+    assert orders[row + 1].order_date == date(2024, 5, 1)
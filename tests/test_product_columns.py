@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from product_columns import ProductColumns
+from product_queries import SORT_OPTIONS
+from row_store import ProductRecord
+
+
+def make_product(rng, i, **fields):
+    row = dict(article=f'A{i:05d}', p_name=f'Товар {i % 7}', category_name=f'К{rng.randint(0, 4)}',
+               b_name='Nike', s_name=f'S{rng.randint(0, 3)}', price=rng.randint(1, 20),
+               quantity=rng.randint(0, 5), discount_percent=rng.randint(0, 3),
+               description='x' * rng.randint(0, 5), image_path=None, id=i)
+    row.update(fields)
+    return ProductRecord.from_row(row)
+
+
+def assert_same_filters(columns, products, rng):
+    """Точечно изменённые колонки фильтруют так же, как построенные заново"""
+    fresh = ProductColumns(list(products))
+    for sort_option in list(SORT_OPTIONS) + [None]:
+        for supplier in (None, 'S1', 'S2'):
+            for text in ('', 'yyy', 'товар 3'):
+                assert np.array_equal(columns.filter(text, None, supplier, None, sort_option),
+                                      fresh.filter(text, None, supplier, None, sort_option)), \
+                    (sort_option, supplier, text)
+
+    chosen = rng.sample(range(len(products)), min(20, len(products)))
+    scores = {products[i].article: rng.random() for i in chosen}
+    assert np.array_equal(columns.filter('q', scores), fresh.filter('q', scores))
+
+
+@pytest.mark.parametrize('search_first', [False, True])
+def test_update_append_delete_match_fresh_build(search_first):
+    rng = random.Random(3)
+    products = [make_product(rng, i) for i in range(300)]
+    columns = ProductColumns(list(products))
+    if search_first:
+        # Колонка поиска уже построена и правится вместе с остальными
+        columns.search_mask('товар')
+    next_id = 1000
+
+    for step in range(400):
+        op = rng.random()
+        if op < 0.4 and products:
+            i = rng.randrange(len(products))
+            product = make_product(rng, 0, article=products[i].article,
+                                   s_name=rng.choice(['S1', f'NEW{step}']),
+                                   description='y' * rng.randint(0, 40))
+            products[i] = product
+            columns.update(i, product)
+        elif op < 0.7:
+            product = make_product(rng, next_id, category_name='NK')
+            next_id += 1
+            products.append(product)
+            columns.append(product)
+        elif products:
+            i = rng.randrange(len(products))
+            del products[i]
+            columns.delete(i)
+
+        if step % 40 == 0 or step == 399:
+            assert_same_filters(columns, products, rng)
+
+
+def test_search_column_falls_back_to_objects_over_limit(monkeypatch):
+    rng = random.Random(5)
+    products = [make_product(rng, i) for i in range(50)]
+    monkeypatch.setattr(ProductColumns, 'FIXED_WIDTH_LIMIT', 1000)
+    columns = ProductColumns(list(products))
+    assert columns.search_text is None  # строится при первом поиске
+
+    expected = [i for i, p in enumerate(products) if 'товар 3' in p.p_name.lower()]
+    assert np.flatnonzero(columns.search_mask('Товар 3')).tolist() == expected
+    assert columns.search_text.dtype == object
+
+    long_product = make_product(rng, 99, description='длинное описание ' * 100)
+    columns.append(long_product)
+    assert columns.search_mask('длинное').tolist() == [False] * 50 + [True]
@@ -0,0 +1,81 @@
+import random
+import sqlite3
+
+from product_queries import ProductQuery, ProductPager, SORT_OPTIONS
+
+
+class SqliteDatabase:
+    """Тот же запрос товаров на SQLite: проверяются условия и порядок страниц"""
+
+    def __init__(self, count=120, seed=1):
+        rng = random.Random(seed)
+        self.connection = sqlite3.connect(':memory:')
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript("""
+            CREATE TABLE categories (id INTEGER PRIMARY KEY, category_name TEXT);
+            CREATE TABLE brends (id INTEGER PRIMARY KEY, b_name TEXT);
+            CREATE TABLE suppliers (id INTEGER PRIMARY KEY, s_name TEXT);
+            CREATE TABLE products (id INTEGER PRIMARY KEY, article TEXT UNIQUE, p_name TEXT,
+                                   category_id INT, brend_id INT, supplier_id INT, price REAL,
+                                   quantity INT, discount_percent INT, description TEXT, image_path TEXT);
+            INSERT INTO categories VALUES (1, 'Кроссовки'), (2, 'Туфли');
+            INSERT INTO brends VALUES (1, 'Nike'), (2, 'Adidas');
+            INSERT INTO suppliers VALUES (1, 'Поставщик 1'), (2, 'Поставщик 2');
+        """)
+        for i in range(1, count + 1):
+            # Много равных цен и количеств: порядок внутри них задаёт p.id
+            self.connection.execute(
+                "INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)",
+                (i, f'ART{i:03d}', f'Кроссовки {i}' if i % 3 else f'Туфли {i}', 1 + i % 2, 1 + i % 2,
+                 1 + i % 2, rng.randint(1, 10) * 100, rng.randint(0, 5), rng.randint(0, 3) * 5, ''))
+
+    def execute_query(self, query, params=None):
+        rows = self.connection.execute(query.replace('%s', '?'), params or ()).fetchall()
+        return [dict(row) for row in rows]
+
+
+def all_pages(db, query, page_size):
+    pager = ProductPager(db, page_size, query)
+    products = []
+    while pager.has_more():
+        products.extend(pager.next_page())
+    return [product.article for product in products]
+
+
+def test_select_conditions_and_params_order():
+    query = ProductQuery('кросс', supplier_id=2, category_id=1, sort_option="Цена ↓")
+    sql, params = query.select(after=(500, 7), limit=50, article='ART007')
+
+    assert "p.supplier_id = %s AND p.category_id = %s AND p.article = %s" in sql
+    assert "(p.price < %s OR (p.price = %s AND p.id < %s))" in sql
+    assert sql.endswith("ORDER BY p.price DESC, p.id DESC LIMIT %s")
+    assert params == ('%кросс%',) * 4 + (2, 1, 'ART007', 500, 500, 7, 50)
+
+
+def test_like_pattern_is_escaped():
+    _, params = ProductQuery('50%_off').select()
+    assert params[0] == '%50\\%\\_off%'
+
+
+def test_keyset_pages_match_full_order():
+    db = SqliteDatabase()
+    for sort_option in list(SORT_OPTIONS) + ["Без сортировки"]:
+        for supplier_id in (None, 2):
+            query = ProductQuery(supplier_id=supplier_id, sort_option=sort_option)
+            expected = [row['article'] for row in db.execute_query(*query.select())]
+            assert all_pages(db, query, 7) == expected, (sort_option, supplier_id)
+
+
+def test_count_matches_select():
+    db = SqliteDatabase()
+    query = ProductQuery('ART01', category_id=1)
+    count = db.execute_query(*query.count())[0]['count']
+    assert count == len(db.execute_query(*query.select())) > 0
+
+
+def test_select_by_article_respects_filters():
+    db = SqliteDatabase()
+    matching = ProductQuery(supplier_id=2)
+    assert [row['article'] for row in db.execute_query(*matching.select(article='ART001'))] == ['ART001']
+    other = ProductQuery(supplier_id=1)
+    assert db.execute_query(*other.select(article='ART001')) == []